@@ -3,7 +3,8 @@ import os
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # TODO: add ROOT_DIR to sys.path in entrypoint/top-level when packaged
 
-from .options import gset_full_dbdf, attach_yaml_opts, post_parse_funcs
+from .options import (gset_full_dbdf, attach_yaml_opts, post_parse_funcs,
+                      read_needed_dbdf)
 
 
 @click.command(context_settings=dict(default_map=None,
@@ -24,7 +25,7 @@ from .options import gset_full_dbdf, attach_yaml_opts, post_parse_funcs
 #        currently interpreted as an option;
 #        see: https://github.com/pallets/click/issues/555
 # TODO: add opts: '--multicore', '--interative', '--gui' (using easygui),
-#                 '--partial-saves', '--load-opts', '--save-opts',
+#                 '--load-opts', '--save-opts',
 #                 '--verbose' # TODO: use count opt for -v?
 #  @click.option('-v', '--verbose', count=True)  # TODO: save -v for --verbose?
 @click.version_option('0.7dev', '-v', '--version')
@@ -32,14 +33,16 @@ from .options import gset_full_dbdf, attach_yaml_opts, post_parse_funcs
 def get_user_inputs(ctx, full_dbdf, **yaml_opts):
     for ppf in post_parse_funcs:
         ppf(ctx, yaml_opts)
-    return dict(full_dbdf=full_dbdf, **yaml_opts)
-# TODO add subcommands: plot & resume_calculation (given full/partial data),
+    # NOTE: only now that all opts are parsed is DB_FILE (partially) read
+    db_file, full_dbdf = full_dbdf, read_needed_dbdf(full_dbdf, yaml_opts)
+    return dict(full_dbdf=full_dbdf, db_file=db_file, **yaml_opts)
+# TODO add subcommands: plot,
 #                       help subcmd to display diff opt types (ctrl, plot, etc)
 #                       calibrate multiprocessing chunksize,
 #                       autoupdate README opts help section based on attrs.yaml
 
-# TODO:hash opts to uniq-ID usr-input; useful for --partial-saves & --load-opts
-#      maybe makes more sense to only hash data & anal settings
+# TODO:hash opts to uniq-ID usr-input; useful for --load-opts
+#      (--partial-saves already hashes data & anal settings, see _checkpoint)
 
 
 #  # NOTE: cannot run as __main__ in packaged mode --> remove??
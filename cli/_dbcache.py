@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+import os
+import json
+import hashlib
+
+
+DBCACHE_DIR = 'dbcache'  # TODO: refactor PATH into root
+
+
+class DbFileCache:
+    """Binary cache of the DF parsed from a DB file, so that later runs over
+    the same (unchanged) file can skip parsing it.
+
+    The values are stored column-major in a .npy file, which is loaded w/
+    memory mapping, & the labels & the key of the source file (its resolved
+    path, size, mtime & content hash) in a JSON sidecar. Only DFs of float
+    cols w/ labels that JSON round-trips (i.e. all DB files so far) are cached.
+    """
+
+    _HASH_CHUNK = 1 << 20  # bytes of the source file hashed per read
+    _LABEL_TYPES = (str, int, float)  # NOTE: not bool, despite subclassing int
+
+    def __init__(self, fpath):
+        self.fpath = os.path.realpath(fpath)
+        path_digest = hashlib.sha256(self.fpath.encode()).hexdigest()
+        stem = os.path.join(DBCACHE_DIR, f'{os.path.basename(self.fpath)}-'
+                                         f'{path_digest[:16]}')
+        self.npy_fname, self.meta_fname = f'{stem}.npy', f'{stem}.json'
+
+    def __stat_key(self):
+        stat = os.stat(self.fpath)
+        return {'path': self.fpath, 'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns}
+
+    def __content_hash(self):
+        h = hashlib.sha256()
+        with open(self.fpath, 'rb') as db_file:
+            for chunk in iter(lambda: db_file.read(self._HASH_CHUNK), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def __load_meta(self):
+        try:
+            with open(self.meta_fname, encoding='utf8') as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+    def __write_meta(self, meta):
+        tmp_fname = f'{self.meta_fname}.{os.getpid()}.tmp'
+        with open(tmp_fname, 'w', encoding='utf8') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(tmp_fname, self.meta_fname)  # i.e. atomically
+
+    def load(self):
+        """Returns the cached DF, or None if there's no (valid) cache"""
+        meta = self.__load_meta()
+        if meta is None or not os.path.isfile(self.npy_fname):
+            return None
+        key = self.__stat_key()
+        if any(meta['key'][k] != v for k, v in key.items()):
+            # NOTE: an unchanged size & mtime are trusted to mean unchanged
+            # contents; otherwise only a match of the contents is a cache hit
+            if (meta['key']['size'] != key['size'] or
+                    meta['sha256'] != self.__content_hash()):
+                return None
+            self.__write_meta({**meta, 'key': key})  # e.g. file was touched
+        try:
+            # NOTE: copy-on-write, so the DF can be modified, but not the file
+            values = np.load(self.npy_fname, mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+        if values.shape != (len(meta['index']), len(meta['columns'])):
+            return None
+        return pd.DataFrame(values, copy=False,
+                            index=pd.Index(meta['index'],
+                                           name=meta['index_name']),
+                            columns=pd.Index(meta['columns']))
+
+    @classmethod
+    def is_cacheable(cls, df):
+        labels = df.index.tolist() + df.columns.tolist()
+        return (all(type(lab) in cls._LABEL_TYPES for lab in labels) and
+                all(dtype == float for dtype in df.dtypes))
+
+    def save(self, df):
+        """Caches df, if it's cacheable (silently skipped otherwise)"""
+        if not self.is_cacheable(df):
+            return
+        os.makedirs(DBCACHE_DIR, exist_ok=True)
+        # NOTE: the sidecar is removed 1st & rewritten last, so that it only
+        # ever describes a completely written .npy file
+        if os.path.isfile(self.meta_fname):
+            os.remove(self.meta_fname)
+        tmp_fname = f'{self.npy_fname}.{os.getpid()}.tmp'
+        with open(tmp_fname, 'wb') as npy_file:
+            np.save(npy_file, np.asfortranarray(df.to_numpy(dtype=float)))
+        os.replace(tmp_fname, self.npy_fname)
+        self.__write_meta({'key': self.__stat_key(),
+                           'sha256': self.__content_hash(),
+                           'index': df.index.tolist(),
+                           'index_name': df.index.name,
+                           'columns': df.columns.tolist()})
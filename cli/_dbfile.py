@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+
+from ._dbcache import DbFileCache
+
+
+DATE_FORMAT = '%d-%m-%Y'  # i.e. that of all date labels once normalized
+# (day-first) formats tried in turn on the dates not in the given format
+_REPAIR_DATE_FORMATS = ('%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y',
+                        '%d-%m-%y', '%d/%m/%y', '%d.%m.%y', '%Y-%m-%d')
+
+
+def parse_dates(labels, date_format=DATE_FORMAT):
+    """Parses the date labels into a DatetimeIndex: 1st w/ date_format, then
+    w/ each of the repair formats, for the labels not yet parsed (e.g. those
+    of DB files w/ mixed formats, like '17-07-03' & '1/8/2003')"""
+    if pd.api.types.is_datetime64_any_dtype(labels):  # e.g. from xlsx cells
+        return pd.DatetimeIndex(labels)
+    labels = pd.Index(labels).astype(str)
+    dates = pd.Series(pd.NaT, index=range(len(labels)), dtype='datetime64[ns]')
+    for fmt in (date_format, *_REPAIR_DATE_FORMATS):
+        unparsed = dates.isna().to_numpy()
+        if not unparsed.any():
+            break
+        dates[unparsed] = pd.to_datetime(labels[unparsed], format=fmt,
+                                         errors='coerce')
+    if dates.isna().any():
+        raise ValueError(f"cannot parse dates {list(labels[dates.isna()])} "
+                         f"w/ format '{date_format}', nor w/ any of: "
+                         f"{', '.join(_REPAIR_DATE_FORMATS)}")
+    return pd.DatetimeIndex(dates)
+
+
+class DbFile:
+    """A DB file of prices, w/ its labels (i.e. its Date index & its ticker
+    columns) read upfront, but whose values are only read when selected.
+
+    The dates are parsed (see parse_dates) & sorted once, & then labelled in
+    the DATE_FORMAT, regardless of the format(s) of the file itself.
+
+    Text files (.csv & .txt) are then only parsed for the selected tickers &
+    range of dates; spreadsheets (.xlsx), which must be parsed whole to find
+    their labels, are parsed once into the (memory-mapped) DbFileCache, from
+    which only the selected values are then copied.
+    """
+
+    _ext2reader_map = {'.csv': ('read_csv', {}),
+                       '.txt': ('read_table', {}),
+                       '.xlsx': ('read_excel', {'engine': 'openpyxl'})}
+    _INDEX_COL = 'Date'  # TODO: make index_col case-insensitive? i.e. 'date'
+
+    def __init__(self, fname, date_format=DATE_FORMAT):
+        self.fpath = Path(fname)
+        if not self.fpath.is_file():
+            raise FileNotFoundError(f"Cannot find file "
+                                    f"'{self.fpath.resolve()}'")
+        fext = self.fpath.suffix
+        if fext not in self._ext2reader_map:
+            raise TypeError(f"Only [{', '.join(self._ext2reader_map.keys())}]"
+                            f" files are currently supported; given: "
+                            f"{self.fpath.name}")
+        read_method, self._reader_kwargs = self._ext2reader_map[fext]
+        self._reader = getattr(pd, read_method)
+        self.name = self.fpath.stem
+
+        self._dbdf = None  # i.e. the whole DF, only ever kept for spreadsheets
+        if fext == '.xlsx':
+            self._dbdf = self.__load_cached_xlsx()
+            file_index, self.columns = self._dbdf.index, self._dbdf.columns
+        else:  # NOTE: only the header line & the Date col are parsed here
+            self._header = self.__read(nrows=0, index_col=None).columns
+            file_index = self.__read(usecols=[self._INDEX_COL]).index
+            self.columns = self._header.drop(self._INDEX_COL)
+        self._file_index = file_index  # i.e. the dates as labelled in file
+        self.__normalize_dates(file_index, date_format)
+
+    def __normalize_dates(self, file_index, date_format):
+        dates = parse_dates(file_index, date_format)
+        if dates.has_duplicates:
+            raise ValueError(f"dates {list(dates[dates.duplicated()].date)} "
+                             f"occur more than once in '{self.fpath.name}'")
+        # positions in the file of the (chronologically) sorted dates
+        self._file_posns = None
+        if not dates.is_monotonic_increasing:
+            from warnings import warn
+            warn(f"dates of '{self.fpath.name}' are not in chronological "
+                 "order; its rows are sorted by date instead")
+            self._file_posns = np.argsort(dates, kind='stable')
+            dates = dates[self._file_posns]
+        self.dates = dates
+        self.index = pd.Index(dates.strftime(DATE_FORMAT),
+                              name=file_index.name)
+
+    def __repr__(self):
+        return (f'{type(self).__name__}({str(self.fpath)!r}): '
+                f'{len(self.index)} dates x {len(self.columns)} tickers')
+
+    def __read(self, **kwargs):
+        kwargs = {'index_col': self._INDEX_COL, **self._reader_kwargs,
+                  **kwargs}
+        return self._reader(self.fpath, **kwargs)
+
+    def __load_cached_xlsx(self):
+        db_cache = DbFileCache(self.fpath)
+        dbdf = db_cache.load()
+        if dbdf is None:  # i.e. file not parsed before, or has since changed
+            dbdf = self.__read()
+            try:
+                db_cache.save(dbdf)
+            except OSError as err:  # NOTE: the cache is only an optimization
+                from warnings import warn
+                warn(f"could not cache the parsed '{self.fpath.name}': {err}")
+        return dbdf
+
+    def __get_tickers(self, tickers):
+        tickers = list(self.columns if tickers is None else tickers)
+        missing = [tick for tick in tickers if tick not in self.columns]
+        if bool(missing):
+            raise KeyError(f"tickers {missing} NOT found in the columns of DB "
+                           f"file '{self.fpath.name}'")
+        return tickers
+
+    def read(self, tickers=None, rows=slice(None)):
+        """Reads the DF of the selected tickers (all by default) & the dates
+        at the positions given by the slice rows (all by default)"""
+        tickers = self.__get_tickers(tickers)
+        file_rows = (rows if self._file_posns is None else
+                     self._file_posns[rows])
+        if self._dbdf is not None:
+            # NOTE: for a memory-mapped DF, only the selected values are read
+            dbdf = self._dbdf.iloc[file_rows,
+                                   self.columns.get_indexer(tickers)]
+        else:
+            dbdf = self.__read_text(tickers, file_rows)
+        dbdf.index = self.index[rows]
+        dbdf.columns.name = self.name
+        return dbdf
+
+    def __read_text(self, tickers, file_rows):
+        # NOTE: cols are selected by position, as duplicate col names in the
+        # header are only disambiguated (i.e. renamed) after parsing
+        usecols = self._header.get_indexer([self._INDEX_COL, *tickers])
+        if isinstance(file_rows, slice):  # i.e. a contiguous range of lines
+            start, stop, _ = file_rows.indices(len(self.index))
+            dbdf = self.__read(usecols=usecols, nrows=max(stop - start, 0),
+                               skiprows=range(1, start + 1))  # 0: header
+            if not dbdf.index.equals(self._file_index[file_rows]):
+                # e.g. when blank lines (which are skipped) offset the rows
+                dbdf = self.__read(usecols=usecols).iloc[file_rows]
+        else:  # i.e. the rows of a file not sorted by date
+            dbdf = self.__read(usecols=usecols).iloc[file_rows]
+        return self.__as_floats(dbdf, tickers)
+
+    @staticmethod
+    def __as_floats(dbdf, tickers):
+        # NOTE: cols of whole #s in the selected rows are parsed as ints, but
+        # would (mostly) be floats when parsed in full; so always use floats
+        return dbdf[tickers].astype({tick: float for tick in tickers if
+                                     pd.api.types.is_integer_dtype(
+                                         dbdf[tick])})
+
+    def iter_chunks(self, chunk_rows, tickers=None):
+        """Yields the DFs of the selected tickers (all by default) for
+        consecutive (chronological) chunks of at most chunk_rows dates, so
+        that the whole file is never parsed into memory at once"""
+        tickers = self.__get_tickers(tickers)
+        n_rows = len(self.index)
+        if self._dbdf is not None:  # i.e. already memory-mapped
+            for a in range(0, n_rows, chunk_rows):
+                yield self.read(tickers, slice(a, a + chunk_rows))
+            return
+        if self._file_posns is not None:
+            # NOTE: a file not sorted by date has to be read whole anyway
+            dbdf = self.read(tickers)
+            for a in range(0, n_rows, chunk_rows):
+                yield dbdf.iloc[a:a + chunk_rows]
+            return
+        usecols = self._header.get_indexer([self._INDEX_COL, *tickers])
+        a = 0
+        with self.__read(usecols=usecols, chunksize=chunk_rows) as reader:
+            for dbdf in reader:
+                rows = slice(a, a + len(dbdf))
+                assert dbdf.index.equals(self._file_index[rows]),\
+                    f"'{self.fpath.name}' was modified while being read"
+                dbdf = self.__as_floats(dbdf, tickers)
+                dbdf.index = self.index[rows]
+                dbdf.columns.name = self.name
+                yield dbdf
+                a = rows.stop
@@ -2,11 +2,11 @@ import click
 from click.core import ParameterSource
 
 import yaml
+import numpy as np
 import pandas as pd
 import os
 
-from pathlib import Path
-
+from ._dbfile import DbFile, parse_dates, DATE_FORMAT
 # NOTE: import below is reified by eval() call, NOT unused as implied by linter
 from ._vnargs import VnargsOption
 from . import ROOT_DIR
@@ -77,26 +77,7 @@ def attach_yaml_opts():
 
 # helper for reading a string filepath representing a datafile into a Pandas DF
 def _read_fname_to_df(fname):
-    fpath = Path(fname)
-    fext = fpath.suffix
-
-    if fpath.is_file():
-        ext2reader_map = {'.csv': ('read_csv', {}),
-                          '.txt': ('read_table', {}),
-                          '.xlsx': ('read_excel', {'engine': 'openpyxl'})}
-        if fext in ext2reader_map.keys():
-            read_method, reader_kwargs = ext2reader_map[fext]
-            reader = getattr(pd, read_method)
-        else:
-            raise TypeError(f"Only [{', '.join(ext2reader_map.keys())}] files "
-                            f"are currently supported; given: {fpath.name}")
-    else:
-        raise FileNotFoundError(f"Cannot find file '{fpath.resolve()}'")
-
-    # TODO: make index_col case-insensitive? i.e. 'Date' or 'date'
-    data_df = reader(fpath, index_col='Date', **reader_kwargs)
-    data_df.columns.name = fpath.stem
-    return data_df
+    return DbFile(fname).read()
 
 
 # TODO: optimize using list.index(value)?
@@ -333,14 +314,15 @@ def validate_approach_args(ctx, param, approach_args):
 
 # callback for the full_dbdf positional Argument (NOT Option)
 def gset_full_dbdf(ctx, param, db_fname):
-    """Open and read the passed string filepath as a Pandas DataFrame. Then
-    infer default values for {tickers, date_i & date_f} from the loaded DF,
-    if they were not manually set inside of: config/options/attributes.yaml
+    """Open the passed string filepath as a DbFile (i.e. only read its labels;
+    see read_needed_dbdf for its values). Then infer default values for
+    {tickers, date_i & date_f} from its labels, if they were not manually set
+    inside of: config/options/attributes.yaml
 
     NOTE: the function mutates the ctx state to add the inferred default vals
     """
 
-    full_dbdf = _read_fname_to_df(db_fname)
+    full_dbdf = DbFile(db_fname, ctx.params['date_format'])
 
     full_dates = full_dbdf.index
     # inferred index of date_i; only used when 'default' date_i not set in YAML
@@ -357,9 +339,7 @@ def gset_full_dbdf(ctx, param, db_fname):
         if opt.default is None:
             opt.default = infrd_dflt
 
-    # TODO: consider instead of read file & return DF, just return file handle?
     return full_dbdf
-    # FIXME: performance mighe be somewhat reduced due to this IO operation???
 
 
 #  def set_tickers_from_textfile(ctx, param, tickers):
@@ -379,6 +359,15 @@ def confirm_group_flag_set(ctx, param, val):
     return val
 
 
+# callback for the date_i & date_f options
+def normalize_date(ctx, param, date):
+    # NOTE: i.e. dates may be given in any format that DB_FILE's may be in
+    if date is None:
+        return date
+    return parse_dates([date], ctx.params['date_format']).strftime(
+        DATE_FORMAT)[0]
+
+
 def determine_lookback_override(ctx, param, lb_ov):
     opt = param.name
     cond = (ctx.get_parameter_source(opt) == ParameterSource.DEFAULT
@@ -554,32 +543,29 @@ def conditionally_toggle_tail_flag_(ctx, yaml_opts):
 # helper for get/setting monthly lookback values
 def gset_monthly_approach_bounds_(ctx, yaml_opts):
     if ctx._approach == 'monthly':
-        from operator import itemgetter
         di, df = yaml_opts['date_i'], yaml_opts['date_f']
         full_dbdf = ctx.params['full_dbdf']
         full_dates = full_dbdf.index
 
-        # NOTE: all dates are assumed to be in the DD-MM-YYYY format
-        anal_months = sorted({date[3:] for date in full_dbdf.loc[di:df].index},
-                             key=itemgetter(slice(-4, None), slice(2)))
-        # the above key sorts the MM-YYYY vals first by year, then by month
-
-        # init dict to store characteristic date bounds of each month
-        monthly_bounds = {mm: [] for mm in anal_months}
-        for i, date in enumerate(full_dates):
-            mmyyyy = date[3:]
-            if mmyyyy in monthly_bounds:
-                cmm = monthly_bounds[mmyyyy]
-                if len(cmm) == 0:  # i.e. when no bounds stored
-                    d0_idx = max(i - 1, 0)  # max w/ 0 to ensure no -ve index
-                    cmm.append(full_dates[d0_idx])
-                    cmm.append(full_dates[d0_idx + 1])
-                elif len(cmm) == 2:  # i.e. when d0 & d1 are stored
-                    cmm.append(date)
-                else:  # continuously update dN to the newest date of the month
-                    cmm[2] = date
-        yaml_opts['monthly_bounds'] = {mm: tuple(mb) for mm, mb in
-                                       monthly_bounds.items() if len(mb) == 3}
+        # NOTE: the parsed dates of DbFile are used, rather than the labels
+        mkeys = (12 * full_dbdf.dates.year + full_dbdf.dates.month).to_numpy()
+        anal_mkeys = mkeys[full_dates.get_loc(di):full_dates.get_loc(df) + 1]
+
+        # posns of the 1st & last dates (& # of dates) of each (sorted) month
+        ukeys, d1_posns, n_dates = np.unique(mkeys, return_index=True,
+                                             return_counts=True)
+        dN_posns = len(mkeys) - 1 - np.unique(mkeys[::-1],
+                                              return_index=True)[1]
+        # NOTE: months w/ a single date (i.e. w/ no dN != d1) are dropped
+        in_anal = np.isin(ukeys, anal_mkeys) & (n_dates > 1)
+        d0_posns = np.maximum(d1_posns - 1, 0)  # max w/ 0 to ensure no -ve idx
+
+        # characteristic date bounds of each month: (d0, d1, dN)
+        yaml_opts['monthly_bounds'] = {
+            full_dates[d1][3:]: (full_dates[d0], full_dates[d0 + 1],
+                                 full_dates[dN])
+            for d0, d1, dN in zip(d0_posns[in_anal], d1_posns[in_anal],
+                                  dN_posns[in_anal])}
         #  from collections import namedtuple
         #  # Ea. Month :: d0: last date prev month, d1: 1st date, dN: last date
         #  MonthlyBounds = namedtuple('Monthly_Bounds', ['d0', 'd1', 'dN'])
@@ -588,10 +574,9 @@ def gset_monthly_approach_bounds_(ctx, yaml_opts):
         # see: https://stackoverflow.com/a/1816969/5437918
 
         # adjust initial & final dates appropriately; they'll be validated next
-        anal_months = list(monthly_bounds.keys())
-        month_i, month_f = anal_months[0], anal_months[-1]
-        yaml_opts['date_i'] = monthly_bounds[month_i][0]
-        yaml_opts['date_f'] = monthly_bounds[month_f][-1]
+        monthly_bounds = list(yaml_opts['monthly_bounds'].values())
+        yaml_opts['date_i'] = monthly_bounds[0][0]
+        yaml_opts['date_f'] = monthly_bounds[-1][-1]
 
 
 # helper for validating analysis dates
@@ -609,10 +594,30 @@ def validate_df_date_indexes(ctx, yaml_opts):
 
     if hasattr(ctx, '_xmins_df') and isinstance(ctx._xmins_df, pd.DataFrame):
         anal_freq = yaml_opts['approach_args'][2]
-        anal_dates = full_dbdf.loc[di:df:anal_freq].index
+        full_dates = full_dbdf.index
+        anal_dates = full_dates[full_dates.get_loc(di):
+                                full_dates.get_loc(df) + 1:anal_freq]
         _assert_dates_in_df(ctx._xmins_df, anal_dates)
 
 
+# reads from DB_FILE only the tickers & dates needed, i.e. those from date_f
+# back to the earliest date any (lookback) window or Clauset xmin may need
+def read_needed_dbdf(db_file, yaml_opts):
+    _, lookback, anal_freq = yaml_opts['approach_args']
+    lookback = yaml_opts['lb_override'] or lookback or 0
+    n_back = lookback + yaml_opts['tau'] + 1
+    xmin_rule, xmin_qnty = yaml_opts['xmin_args']
+    if xmin_rule == 'average':  # Clauset xmins are precomputed further back
+        rws, lag, _ = xmin_qnty
+        n_back += rws + lag + lookback
+    # NOTE: date bounds may be realigned (fore or aft) to the analysis freq.
+    n_ext = anal_freq or 1
+    full_dates = db_file.index
+    i = max(full_dates.get_loc(yaml_opts['date_i']) - n_back - n_ext, 0)
+    f = full_dates.get_loc(yaml_opts['date_f']) + n_ext
+    return db_file.read(yaml_opts['tickers'], slice(i, f + 1))
+
+
 post_parse_funcs = (validate_norm_timings_,
                     conditionalize_normalization_options_,
                     conditionally_toggle_tail_flag_,
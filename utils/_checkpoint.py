@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+import os
+import json
+import hashlib
+from time import monotonic
+
+
+CHECKPOINT_DIR = 'checkpoints'  # TODO: refactor PATH into root
+
+
+def settings_digest(settings):
+    """Hashes the data, returns & analysis settings (i.e. all those that
+    determine the results) into a hex digest"""
+    h = hashlib.sha256()
+    for ss in ('data', 'rtrn', 'anal'):
+        for sett, val in sorted(vars(getattr(settings, ss)).items()):
+            if callable(val):  # e.g. get_dyn_lbd
+                continue
+            h.update(sett.encode())
+            if isinstance(val, (pd.DataFrame, pd.Series, pd.Index)):
+                h.update(pd.util.hash_pandas_object(val).to_numpy().tobytes())
+                if isinstance(val, pd.DataFrame):
+                    h.update(repr(list(val.columns)).encode())
+            else:
+                h.update(repr(val).encode())
+    return h.hexdigest()
+
+
+class Checkpoint:
+    """Append-only log of the stats of completed analysis iterations.
+
+    Each line is the JSON list [task, row, cols, vals], where task is the
+    encoded iter_id, & (row, cols) are the positions in Results of vals.
+    """
+
+    _FLUSH_SECS = 30  # max. # of seconds of finished work to lose on a crash
+
+    def __init__(self, settings, resume=False):
+        digest = settings_digest(settings)
+        self.fname = os.path.join(CHECKPOINT_DIR, f'{digest[:16]}.jsonl')
+        self._mode = 'a' if resume else 'w'  # i.e. fresh runs start anew
+        self._file = None
+        self._last_flush = monotonic()
+
+    def __getstate__(self):  # NOTE: the log is only ever written by 1 process
+        return {**vars(self), '_file': None}
+
+    def load(self):
+        """Yields the records logged by previous (interrupted) runs"""
+        if not os.path.isfile(self.fname):
+            return
+        with open(self.fname, encoding='utf8') as ckpt:
+            for line in ckpt:
+                try:
+                    task, row, cols, vals = json.loads(line)
+                except ValueError:
+                    continue  # i.e. line only partially written b4 a crash
+                yield tuple(task), row, cols, vals
+
+    def append(self, task, row, cols, vals):
+        if self._file is None:
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+            self._file = open(self.fname, self._mode, encoding='utf8')
+            if self._file.tell() > 0:  # end any partially written line
+                self._file.write('\n')
+        vals = np.asarray(vals, dtype=float).tolist()  # NaN's are kept as-is
+        self._file.write(json.dumps([task, row, cols, vals]) + '\n')
+        if monotonic() - self._last_flush > self._FLUSH_SECS:
+            self.flush()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
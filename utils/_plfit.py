@@ -0,0 +1,429 @@
+import numpy as np
+
+
+# NOTE: max # of (candidate xmin × evaluation point) elements held in memory
+# at once when scanning for the KS distances; ~8 MB worth of float64
+_SCAN_BLOCK_SIZE = 2**20
+
+
+class NativeFit:
+    """Vectorized continuous power law fit following Clauset et al. (2007),
+    meant as a drop-in replacement for powerlaw.Fit within the Analyzer.
+
+    The data is sorted only once, after which the MLE alpha for every
+    candidate xmin is obtained from a reversed cumulative sum of the logged
+    data, and the KS distances of all candidates from blocked NumPy ops.
+
+    The candidate xmins, the empirical & theoretical CDFs used for the KS
+    distances, and the tie-breaking on the minimum distance all follow the
+    semantics of powerlaw.Fit(xmin=None), so the two engines select the same
+    xmin except for candidates whose KS distances tie to within float64
+    rounding (~1e-15); alpha & sigma then agree to within 1e-10 (relative).
+    """
+
+    def __init__(self, data, xmin=None, discrete=False):
+        if discrete:
+            raise ValueError("the native fitting engine only supports "
+                             "continuous data; use '--fit-engine powerlaw'")
+        self.data = np.asarray(data, dtype=float)
+        self.discrete = discrete
+        self.given_xmin = xmin
+        self._pl_fit = None
+        self.warm_started = self.warm_fallback = False
+        if xmin is None:
+            self._find_xmin()
+        else:
+            self._fit_fixed_xmin(float(xmin))
+
+    def _fit_fixed_xmin(self, xmin):
+        tail = self.data[self.data >= xmin]
+        self.n_tail = len(tail)
+        self.xmin = xmin
+        self.alpha = 1 + self.n_tail / np.sum(np.log(tail / xmin))
+        self.sigma = (self.alpha - 1) / np.sqrt(self.n_tail)
+        self.D = np.nan
+
+    # alternate constructor for when the sorted positive data, its logs &
+    # their reversed cumsums are already at hand (e.g. from RollingFitter)
+    @classmethod
+    def from_sorted(cls, data, x, logx, rcs, xmin_hint=None, radius=None):
+        fit = cls._blank(data)
+        fit._scan_sorted(x, logx, rcs, xmin_hint, radius)
+        return fit
+
+    # alternate constructor for results already found by fit_columns
+    @classmethod
+    def from_scan_result(cls, data, xmin, alpha, D, n_tail):
+        fit = cls._blank(data)
+        fit.xmin, fit.alpha, fit.D, fit.n_tail = xmin, alpha, D, n_tail
+        fit.sigma = (alpha - 1) / np.sqrt(n_tail) if n_tail else np.nan
+        return fit
+
+    @classmethod
+    def _blank(cls, data):
+        fit = cls.__new__(cls)
+        fit.data = np.asarray(data, dtype=float)
+        fit.discrete = False
+        fit.given_xmin = None
+        fit._pl_fit = None
+        fit.warm_started = fit.warm_fallback = False
+        return fit
+
+    def _find_xmin(self):
+        # NOTE: non-positive values can never produce a valid (alpha > 1)
+        # fit, so they are dropped upfront instead of scanned & then masked
+        x = np.sort(self.data[self.data > 0])
+        logx = np.log(x)
+        self._scan_sorted(x, logx, reversed_cumsum(logx))
+
+    def _scan_sorted(self, x, logx, rcs, xmin_hint=None, radius=None):
+        first = first_occurrences(x)
+        cands = first[:-1]  # the largest value can't be xmin; need 2+ points
+        if len(cands) == 0:
+            self.xmin = self.alpha = self.sigma = self.D = np.nan
+            self.n_tail = 0
+            self.xmins = self.alphas = self.Ds = np.array([np.nan])
+            return
+        if xmin_hint is not None and radius is not None:
+            # warm start: only scan the candidates ranked w/in radius of the
+            # hint, unless the best of those lies on the neighbourhood's edge
+            k = np.searchsorted(x[cands], xmin_hint)
+            lo, hi = max(k - radius, 0), min(k + radius + 1, len(cands))
+            self.warm_started = True
+            self.alphas, self.Ds = scan_xmins(logx, rcs, cands[lo:hi], first)
+            best = np.argmin(self.Ds)
+            if (best == 0 < lo) or (best == hi - lo - 1 and hi < len(cands)):
+                self.warm_fallback = True
+            else:
+                cands = cands[lo:hi]
+        if not self.warm_started or self.warm_fallback:
+            self.alphas, self.Ds = scan_xmins(logx, rcs, cands, first)
+            best = np.argmin(self.Ds)
+        self.xmins = x[cands]
+        self.xmin = self.xmins[best]
+        self.alpha = self.alphas[best]
+        self.D = self.Ds[best]
+        self.n_tail = len(x) - cands[best]
+        self.sigma = (self.alpha - 1) / np.sqrt(self.n_tail)
+
+    # lazily delegate to powerlaw (at the already found xmin, i.e. w/o a scan)
+    # for the likelihood ratio tests, which only run w/ --compare
+    def distribution_compare(self, *args, **kwargs):
+        if self._pl_fit is None:
+            from powerlaw import Fit
+            self._pl_fit = Fit(data=self.data, xmin=self.xmin,
+                               discrete=self.discrete, verbose=False)
+        return self._pl_fit.distribution_compare(*args, **kwargs)
+
+
+def fit_columns(data_arrays):
+    """Batched NativeFit(xmin=None) of many data arrays in one 2-D pass.
+
+    The positive values of each array are stacked as the columns of a single
+    NaN-padded matrix, which is sorted, log-summed & KS-scanned column-wise,
+    so the Python overhead is paid per batch rather than per array. Returns
+    a list of NativeFit objects, in the same order as data_arrays.
+    """
+    data_arrays = [np.asarray(data, dtype=float) for data in data_arrays]
+    positives = [data[data > 0] for data in data_arrays]
+    X = np.full((max(map(len, positives), default=0), len(positives)), np.nan)
+    for col, pos in enumerate(positives):
+        X[:len(pos), col] = pos
+    X.sort(axis=0)  # NaNs are sorted to the end of each column
+    return [NativeFit.from_scan_result(data, *res) for data, res
+            in zip(data_arrays, zip(*scan_xmins_2d(X)))]
+
+
+class WarmStartFitter:
+    """Clauset fits of consecutive windows of a series, w/ each xmin-scan
+    warm-started from the xmin found for the previous window.
+
+    Only the candidate xmins w/in radius (in rank) of the previous xmin are
+    scanned; should the best of these lie on the edge of that neighbourhood,
+    or should its KS distance D be worse than the previous window's,
+    the optimum is likely outside of it, and all candidates are scanned
+    instead. Every RESCAN_EVERY-th window is also scanned in full, so that
+    a local optimum isn't carried over indefinitely. A radius of None always
+    scans all candidates.
+
+    NOTE: the warm-started xmins are thus approximate, i.e. may still differ
+    from those of a full scan (b/w the periodic rescans); each fit's
+    warm_started & warm_fallback flags tell which ones are
+    """
+
+    RESCAN_EVERY = 20  # i.e. # of windows per full rescan (see Settings)
+    # max. relative increase in D over the previous window's; NOTE: even a
+    # tolerance of a few % lets ~2x as many local optima through as 0 does,
+    # & no D check at all ~3-10x, for only ~1.3x faster fits
+    _D_RTOL = 0.
+
+    def __init__(self, radius=None):
+        self.radius = radius
+        self._xmin = self._D = None
+        self._n_fits = 0
+        self.n_warm = 0       # number of warm-started fits
+        self.n_fallbacks = 0  # ... of which fell back to a full scan
+
+    def fit(self, data):
+        data = np.asarray(data, dtype=float)
+        x = np.sort(data[data > 0])
+        logx = np.log(x)
+        return self._fit_sorted(data, x, logx, reversed_cumsum(logx))
+
+    def _fit_sorted(self, data, x, logx, rcs):
+        rescan = self._n_fits % self.RESCAN_EVERY == 0
+        self._n_fits += 1
+        fit = NativeFit.from_sorted(data, x, logx, rcs,
+                                    None if rescan else self._xmin,
+                                    self.radius)
+        if (fit.warm_started and not fit.warm_fallback and
+                fit.D > self._D * (1 + self._D_RTOL)):
+            fit = NativeFit.from_sorted(data, x, logx, rcs)  # i.e. full
+            fit.warm_started = fit.warm_fallback = True
+        self.n_warm += fit.warm_started
+        self.n_fallbacks += fit.warm_fallback
+        self._xmin = None if np.isnan(fit.xmin) else fit.xmin
+        self._D = fit.D
+        return fit
+
+
+class RollingFitter(WarmStartFitter):
+    """Incremental NativeFit for consecutive, overlapping windows of a series.
+
+    The positive data of the last fitted window is kept sorted, along w/ its
+    logs & their reversed cumulative sums (the sufficient statistics of the
+    xmin-scan). When the next window is the previous one w/ some values
+    evicted from its start & some appended to its end, only those values are
+    deleted from & merged into the sorted arrays, and the cumulative sums are
+    corrected by the deltas, all in O(W) instead of an O(W log W) re-sort.
+    Windows that don't overlap this way are simply fitted from scratch. The
+    xmin-scans can additionally be warm-started as in the WarmStartFitter.
+    """
+
+    # cumsums are recomputed exactly after this many incremental updates, to
+    # keep the floating point drift from the repeated +/- corrections bounded
+    _REFRESH_EVERY = 256
+    # max # of possible window shifts to try matching before giving up
+    _MAX_SHIFT_TRIES = 8
+
+    def __init__(self, radius=None):
+        super().__init__(radius)
+        self._seq = None  # positive values of the last window, in time order
+        self._n_updates = 0
+
+    def fit(self, data):
+        data = np.asarray(data, dtype=float)
+        seq = data[data > 0]
+        if self._update(seq):
+            self._n_updates += 1
+            if self._n_updates % self._REFRESH_EVERY == 0:
+                self._rcs = reversed_cumsum(self._logx)
+        else:
+            self._rebuild(seq)
+        return self._fit_sorted(data, self._x, self._logx, self._rcs)
+
+    def _rebuild(self, seq):
+        self._x = np.sort(seq)
+        self._logx = np.log(self._x)
+        self._rcs = reversed_cumsum(self._logx)
+        self._seq = seq
+        self._last_shift = None
+
+    # incrementally update the sorted state to seq; False if not possible
+    def _update(self, seq):
+        shift = self._find_shift(seq)
+        if shift is None:
+            return False
+        self._evict(self._seq[:shift])
+        self._insert(seq[len(self._seq) - shift:])
+        self._seq = seq
+        self._last_shift = shift
+        return True
+
+    # find the # of leading values of the previous window evicted to get seq
+    def _find_shift(self, seq):
+        old = self._seq
+        if old is None or len(old) == 0 or len(seq) == 0:
+            return None
+        tries = [] if self._last_shift is None else [self._last_shift]
+        tries += list(np.flatnonzero(old == seq[0])[:self._MAX_SHIFT_TRIES])
+        for shift in tries:
+            n_kept = len(old) - shift
+            # rebuilding is cheaper once most of the window has changed
+            if 2 * n_kept < len(old) or n_kept > len(seq):
+                continue
+            if np.array_equal(old[shift:], seq[:n_kept]):
+                return shift
+        return None
+
+    def _evict(self, vals):
+        if len(vals) == 0:
+            return
+        vals = np.sort(vals)
+        pos = np.searchsorted(self._x, vals) + _rank_within_ties(vals)
+        delta = np.zeros(len(self._rcs))
+        np.add.at(delta, pos, self._logx[pos])
+        self._rcs -= reversed_cumsum(delta)[:-1]
+        self._x = np.delete(self._x, pos)
+        self._logx = np.delete(self._logx, pos)
+        self._rcs = np.delete(self._rcs, pos)
+
+    def _insert(self, vals):
+        if len(vals) == 0:
+            return
+        vals = np.sort(vals)
+        logv = np.log(vals)
+        pos = np.searchsorted(self._x, vals)
+        # old entry i gains the logs of all values inserted after it...
+        delta = np.zeros(len(self._rcs) + 1)
+        np.add.at(delta, pos, logv)
+        new_rcs = self._rcs[pos] + reversed_cumsum(logv)[:-1]
+        self._rcs += reversed_cumsum(delta)[1:-1]
+        # ... while inserted values sum the logs of all entries after them
+        self._x = np.insert(self._x, pos, vals)
+        self._logx = np.insert(self._logx, pos, logv)
+        self._rcs = np.insert(self._rcs, pos, new_rcs)
+
+
+class ExpandingFitter(RollingFitter):
+    """Append-only variant of the RollingFitter for expanding windows.
+
+    Every window of the 'increasing' approach is the previous one plus the
+    newest returns, so nothing is ever evicted; the new values are merged
+    into the persistent sorted tail & cumsums as in the RollingFitter, but
+    w/o keeping (or comparing against) the full history of past windows.
+    """
+
+    def __init__(self, radius=None):
+        super().__init__(radius)
+        self._n_seen = 0    # length of the last window's positive data
+        self._last = None   # & its latest value, to check continuity
+
+    def _rebuild(self, seq):
+        super()._rebuild(seq)
+        self._seq = None
+        self._mark_seen(seq)
+
+    def _update(self, seq):
+        n_old = self._n_seen
+        if not (0 < n_old <= len(seq) and seq[n_old - 1] == self._last):
+            return False
+        self._insert(seq[n_old:])
+        self._mark_seen(seq)
+        return True
+
+    def _mark_seen(self, seq):
+        self._n_seen = len(seq)
+        self._last = seq[-1] if len(seq) else None
+
+
+# # helpers operating on an ascendingly sorted array # #
+
+# rank of each element amongst the run of equal values it belongs to
+def _rank_within_ties(x):
+    idx = np.arange(len(x))
+    return idx - np.maximum.accumulate(np.where(np.r_[True, x[1:] != x[:-1]],
+                                                idx, 0))
+
+
+# positions of the 1st occurrence of each unique value in sorted array x
+def first_occurrences(x):
+    return np.flatnonzero(np.r_[True, x[1:] != x[:-1]])
+
+
+# rcs[i] = sum(v[i:]), w/ a trailing 0 so that rcs[len(v)] is also valid
+def reversed_cumsum(v):
+    return np.r_[np.cumsum(v[::-1])[::-1], 0.]
+
+
+def scan_xmins(logx, rcs, cands, evals):
+    """Computes the MLE alpha & KS distance D for every candidate xmin.
+
+    logx:  log of the sorted (ascending) positive data
+    rcs:   reversed cumulative sums of logx (see reversed_cumsum)
+    cands: positions in logx of the candidate xmins
+    evals: ascending positions at which the empirical & fitted CDFs are
+           compared; the empirical CDF at position j is taken as the fraction
+           of the tail strictly below logx[j] (i.e. j must be a 1st occurrence)
+    """
+    n = len(logx)
+    n_tail = n - cands
+    alphas = 1 + n_tail / (rcs[cands] - n_tail * logx[cands])
+
+    Ds = np.empty(len(cands))
+    # NOTE: small enough blocks also skip most of the lower triangle below
+    rows_per_block = max(1, min(_SCAN_BLOCK_SIZE // len(evals),
+                                -(-len(cands) // 8)))
+    for b0 in range(0, len(cands), rows_per_block):
+        blk = slice(b0, b0 + rows_per_block)
+        c = cands[blk, None]
+        # only evaluation points at or above the block's 1st xmin can matter
+        e = evals[np.searchsorted(evals, cands[b0]):]
+        # NOTE: clipping at 0 zeroes both CDFs for evaluation points below
+        # the candidate xmin, so they drop out of the max. abs. difference
+        emp_cdf = np.maximum(e - c, 0) / n_tail[blk, None]
+        fit_cdf = -np.expm1((1 - alphas[blk, None]) *
+                            np.maximum(logx[e] - logx[c], 0.))
+        Ds[blk] = np.abs(fit_cdf - emp_cdf).max(axis=1)
+    return alphas, Ds
+
+
+def scan_xmins_2d(X):
+    """Column-wise Clauset xmin-scan of the matrix X, whose columns hold
+    ascendingly sorted positive data, padded at their ends w/ NaNs.
+
+    Follows the same semantics as scan_xmins, w/ each column's 1st
+    occurrences of its unique values compacted to the top of the matrix, so
+    that the work per column matches that of the 1-D scan. Returns the
+    arrays (xmins, alphas, Ds, n_tails) of the best fit of each column, which
+    are NaN (& n_tail 0) for columns w/ less than 2 unique values.
+    """
+    n_rows, n_cols = X.shape
+    valid = ~np.isnan(X)
+    n = valid.sum(axis=0)
+    logX = np.log(X)
+    rcs = np.cumsum(np.where(valid, logX, 0.)[::-1], axis=0)[::-1]
+
+    # move the 1st occurrence of each unique value (& its position) to the top
+    first = valid.copy()
+    first[1:] &= X[1:] != X[:-1]
+    n_uniq = first.sum(axis=0)
+    order = np.argsort(~first, axis=0, kind='stable')[:max(n_uniq, default=0)]
+    pos = np.broadcast_to(np.arange(n_rows)[:, None], X.shape)
+    U, pos, logU, rcsU = (np.take_along_axis(arr, order, axis=0)
+                          for arr in (X, pos, logX, rcs))
+    in_uniq = np.arange(len(order))[:, None] < n_uniq
+    cands = in_uniq & (np.arange(len(order))[:, None] < n_uniq - 1)
+
+    n_tail = n - pos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alphas = 1 + n_tail / (rcsU - n_tail * logU)
+
+    Ds = np.full(logU.shape, np.inf)
+    # NOTE: small enough blocks also skip most of the lower triangle below
+    rows_per_block = max(1, min(_SCAN_BLOCK_SIZE // max(logU.size, 1),
+                                -(-len(order) // 8)))
+    for b0 in range(0, len(order), rows_per_block):
+        blk = slice(b0, b0 + rows_per_block)
+        evals = slice(b0, None)  # only ever need to compare at rows >= b0
+        # NOTE: fmax zeroes the CDFs at evaluation points below the candidate
+        # xmins & at the NaN padding; the invalid values from non-candidates
+        # are masked out below
+        with np.errstate(divide='ignore', invalid='ignore'):
+            emp_cdf = (np.maximum(pos[None, evals] - pos[blk, None], 0) /
+                       n_tail[blk, None])
+            dev = np.fmax(logU[None, evals] - logU[blk, None], 0.)
+            dev *= 1 - alphas[blk, None]
+            np.expm1(dev, out=dev)  # i.e. -1 * (fitted CDF)
+            dev += emp_cdf
+            np.abs(dev, out=dev)
+            blk_Ds = np.where(in_uniq[None, evals], dev, 0.).max(axis=1)
+        Ds[blk] = np.where(cands[blk], blk_Ds, np.inf)
+
+    best = np.argmin(Ds, axis=0)[None]
+    found = n_uniq > 1
+
+    def pick(arr, fill):
+        return np.where(found, np.take_along_axis(arr, best, axis=0)[0], fill)
+    return (pick(U, np.nan), pick(alphas, np.nan),
+            pick(Ds, np.nan), pick(n_tail, 0))
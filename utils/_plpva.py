@@ -1,10 +1,15 @@
 import numpy
-import cmath
 import scipy.special
 
+from functools import lru_cache, partial
+from multiprocessing import Pool, current_process
+
+from ._plfit import first_occurrences, reversed_cumsum, scan_xmins
+
 
 def plpva(x, xmin, vec=numpy.arange(1.50, 3.51, 0.01),
-          reps=1000, quiet=False, **kwargs):
+          reps=1000, quiet=False, rng=None, seed=None, nproc=1, stop_at=None,
+          **kwargs):
     """
     % PLPVA calculates the p-value for the given power-law fit to some data.
     %    Source: http://www.santafe.edu/~aaronc/powerlaws/
@@ -62,14 +67,27 @@ def plpva(x, xmin, vec=numpy.arange(1.50, 3.51, 0.01),
     %
     %       p, gof = plpva.plpva(x, 1, reps=10000)
     %
+    % 4. The random draws of the bootstrap are taken from rng, which is to be
+    %    a numpy.random.Generator; a freshly seeded one is used by default.
+    %    Alternatively, given a seed (an int or numpy.random.SeedSequence),
+    %    each repetition draws from its own child of that seed instead, and
+    %    the repetitions can then be spread over nproc processes, w/ results
+    %    identical for a given seed regardless of nproc:
+    %
+    %       p, gof = plpva.plpva(x, 1, seed=42, nproc=4)
+    %
+    % 5. Given a decision threshold stop_at, the bootstrap stops early once a
+    %    (Wilson) confidence interval on the running p-value excludes it, and
+    %    the # of repetitions actually used is returned as well:
+    %
+    %       p, gof, n_reps = plpva.plpva(x, 1, stop_at=0.1)
+    %
     """
 
     x = numpy.array(x)
 
     N = len(x)
 
-    nof = numpy.array([])
-
     if not quiet:
         print("Power-law Distribution, p-value calculation")
         print("   Warning: This can be a slow calculation; please be patient.")
@@ -93,66 +111,15 @@ def plpva(x, xmin, vec=numpy.arange(1.50, 3.51, 0.01),
 
         # compute distribution of gofs from semi-parametric bootstrap
         # of entire data set with fit
-        for B in range(reps):
-            # semi-parametric bootstrap of data
-            n1 = sum(numpy.random.random(N) > pz)
-            q1 = y[numpy.array(numpy.floor(ny * numpy.random.random(n1)),
-                               dtype="int32")]
-            n2 = N - n1
-            q2 = xmin * (1 - numpy.random.random(n2)) ** (-1 / (alpha - 1))
-            q = numpy.sort(numpy.r_[q1, q2])
-
-            # estimate xmin and alpha via GoF-method
-            qmins = numpy.unique(q)
-            qmins = qmins[0:-1]
-            try:
-                qmins = qmins[qmins <= kwargs["limit"]]
-            except KeyError:
-                pass
-            try:
-                qmins = qmins[numpy.array(
-                    numpy.unique(
-                        numpy.round(numpy.linspace(1, len(qmins),
-                                                   kwargs["sample"]) - 1)),
-                    dtype="int32",)]
-            except KeyError:
-                pass
-            dat = numpy.array([])
-            for qmin in qmins:
-                zq = q[q >= qmin]
-                nq = float(len(zq))
-                logvec = numpy.log(zq / qmin)
-                # TODO: look into numpy nansum, nanprod, nan-etc. functions
-                if numpy.inf in numpy.abs(logvec):
-                    # NOTE: when +/- infinity exist in the array
-                    # (i.e. log was given 0 as an argument), a can be set to 0
-                    a = 0
-                elif any(zq / qmin < 0):
-                    # NOTE: when -ve values exist in the array,
-                    #       but no infinity, then must use complex log
-                    logvec = logvec.astype("complex")
-                    nan_idx = numpy.where(numpy.isnan(logvec))[0]
-                    # TODO: the following Python for-loop should be vectorized
-                    for i in nan_idx:
-                        logvec[i] = cmath.log(zq[i] / qmin)
-                    a = nq / sum(logvec)
-                else:
-                    #  a = nq / sum(numpy.log(zq/qmin))
-                    a = nq / sum(logvec)
-                cq = numpy.arange(nq) / nq
-                cf = 1 - (qmin / zq) ** a
-                dat = numpy.r_[dat, max(abs(cq - cf))]  # FIXME: handle ZeroDivisionError on some input data & xmin
-            # store distribution of estimated gof values
-            nof = numpy.r_[nof, min(dat)]
-            if not quiet:
-                print("[%i]\tp = %.4f\n" % (B + 1,
-                                            sum(nof >= gof) / float(B + 1)))
-        p = sum(nof >= gof) / float(len(nof))
+        nof = _bootstrap_gofs(_bootstrap_gof_continuous,
+                              (N, pz, y, xmin, alpha), kwargs,
+                              reps, rng, seed, nproc,
+                              gof, stop_at)
 
     # discrete method
     # ASK/NOTE: is this branch required
     else:
-        zvec = scipy.special.zeta(vec, xmin)  # (2.5)
+        zvec = _zeta_table(xmin, tuple(vec))  # (2.5)
 
         # compute D for the empirical distribution
         z = x[x >= xmin]
@@ -176,91 +143,280 @@ def plpva(x, xmin, vec=numpy.arange(1.50, 3.51, 0.01),
         pz = nz / N
 
         mmax = 20 * xmax
-        pdf = numpy.r_[numpy.zeros(xmin - 1),
-                       (numpy.arange(xmin, mmax + 1) ** -alpha) / zvec[I]]
-        cdf = numpy.r_[[numpy.arange(1, mmax + 2)],
-                       [numpy.r_[numpy.cumsum(pdf), 1]]]
+        cdf = _zeta_cdf(xmin, alpha, zvec[I], mmax)
+        log_zvec = _log_zeta_table(xmin, tuple(vec))
 
         # compute distribution of gofs from semi-parametric bootstrap
         # of entire data set with fit
-        for B in range(reps):
-            # semi-parametric bootstrap of data
-            n1 = sum(numpy.random.random(N) > pz)
-            q1 = y[numpy.array(numpy.floor(ny * numpy.random.random(n1)),
-                               dtype="int32")]
-            n2 = N - n1
-
-            # simple discrete zeta generator
-            r2 = numpy.sort(numpy.random.random(n2))
-            c = 0
-            q2 = numpy.zeros(n2)
-            k = 0
-            for i in range(int(xmin), int(mmax + 2)):
-                while c < len(r2) and r2[c] <= cdf[1, i - 1]:
-                    c = c + 1
-                q2[k:c] = i
-                k = c
-                if k >= n2:
-                    break
-            q = numpy.r_[q1, q2]
-
-            # estimate xmin and alpha via GoF-method
-            qmins = numpy.unique(q)
-            qmins = qmins[0:-1]
-            try:
-                qmins = qmins[qmins <= kwargs["limit"]]
-            except KeyError:
-                pass
-            try:
-                qmins = qmins[
-                    numpy.array(
-                        numpy.unique(
-                            numpy.round(
-                                numpy.linspace(1, len(qmins),
-                                               kwargs["sample"]) - 1
-                            )
-                        ),
-                        dtype="int32",
+        nof = _bootstrap_gofs(_bootstrap_gof_discrete,
+                              (N, pz, y, xmin, mmax, cdf, vec, zvec, log_zvec),
+                              kwargs,
+                              reps, rng, seed, nproc,
+                              gof, stop_at)
+
+    if not quiet:
+        for B, p_B in enumerate(numpy.cumsum(nof >= gof) /
+                                numpy.arange(1, len(nof) + 1)):
+            print("[%i]\tp = %.4f\n" % (B + 1, p_B))
+    p = sum(nof >= gof) / float(len(nof))
+
+    return (p, gof) if stop_at is None else (p, gof, len(nof))
+
+
+def _bootstrap_gof_continuous(rng, N, pz, y, xmin, alpha, **kwargs):
+    # one repetition of the continuous method's bootstrap; returns its min gof
+    # semi-parametric bootstrap of data
+    n1 = rng.binomial(N, 1 - pz)
+    q1 = y[rng.integers(len(y), size=n1)] if n1 else y[:0]
+    n2 = N - n1
+    q2 = xmin * (1 - rng.random(n2)) ** (-1 / (alpha - 1))
+    q = numpy.sort(numpy.r_[q1, q2])
+
+    # estimate xmin and alpha via GoF-method
+    return _min_gof_continuous(q, **kwargs)
+
+
+def _min_gof_continuous(q, limit=None, sample=None):
+    """Minimum KS distance over all candidate qmins of the sorted sample q.
+
+    Replicates the per-qmin loop of the original PLPVA (incl. its handling of
+    non-positive qmins), but takes the alphas of all candidates from a single
+    reversed cumulative sum of the logged data, & their KS distances from
+    blocked array ops (see _plfit.scan_xmins).
+    """
+    cands = first_occurrences(q)[:-1]
+    if limit is not None:
+        cands = cands[q[cands] <= limit]
+    if sample is not None:
+        cands = cands[numpy.array(
+            numpy.unique(numpy.round(numpy.linspace(1, len(cands),
+                                                    sample) - 1)),
+            dtype="int32",)]
+    nq = len(q) - cands
+    dat = numpy.empty(len(cands))
+
+    # for qmin > 0 the tail is all positive, so this is a regular Clauset scan
+    # of the positive data, but w/ the empirical CDF taken at every position
+    n_nonpos = numpy.searchsorted(q, 0, side="right")
+    is_pos = cands >= n_nonpos
+    if is_pos.any():
+        logp = numpy.log(q[n_nonpos:])
+        _, dat[is_pos] = scan_xmins(logp, reversed_cumsum(logp),
+                                    cands[is_pos] - n_nonpos,
+                                    numpy.arange(len(logp)))
+
+    # NOTE: log(zq / qmin) is +/- inf when 0 is in zq or qmin is 0, in which
+    # case a = 0, so the fitted CDF is 0 & D is just the max. empirical CDF
+    is_neg = ~is_pos
+    if n_nonpos and q[n_nonpos - 1] == 0:
+        dat[is_neg] = (nq[is_neg] - 1) / nq[is_neg]
+    elif is_neg.any():
+        best = numpy.nanmin(dat[is_pos]) if is_pos.any() else numpy.inf
+        dat[is_neg] = _scan_negative_qmins(q, cands[is_neg], best)
+    return numpy.nanmin(dat)
+
+
+def _scan_negative_qmins(q, cands, bound=numpy.inf):
+    # KS distances of qmin < 0 candidates of sorted q (w/o 0s), for which the
+    # ratios zq / qmin of positive zq are -ve, so their logs are complex
+    n = len(q)
+    labs = numpy.log(numpy.abs(q))
+    ipi_pos = numpy.where(q > 0, 1j * numpy.pi, 0)  # imag. part of the logs
+    rcs = reversed_cumsum(labs)
+    nq = n - cands
+    a = nq / (rcs[cands] - nq * labs[cands] + ipi_pos.sum())
+
+    def ks_dists(rows, evals):
+        dat = numpy.empty(len(rows))
+        rows_per_block = max(1, 2**18 // len(evals))
+        for b0 in range(0, len(rows), rows_per_block):
+            blk = rows[b0:b0 + rows_per_block, None]
+            c = cands[blk]
+            with numpy.errstate(over="ignore", invalid="ignore"):
+                # (qmin / zq) ** a, w/ log(qmin / zq) = -log(zq / qmin)
+                cf = 1 - numpy.exp(a[blk] * (labs[c] - labs[evals] +
+                                             ipi_pos[evals]))
+                dev = numpy.abs((evals - c) / nq[blk] - cf)
+            dat[b0:b0 + rows_per_block] = numpy.where(evals >= c, dev,
+                                                      0).max(axis=1)
+        return dat
+
+    # these Ds are rarely anywhere near the minimum, so a coarse pass over a
+    # subset of the evaluation points, which gives lower bounds on the Ds, is
+    # usually enough to rule out a candidate w/o scanning all n points
+    rows = numpy.arange(len(cands))
+    dat = ks_dists(rows, numpy.arange(0, n, max(1, n // 32)))
+    rows = rows[~(dat > bound)]
+    dat[rows] = ks_dists(rows, numpy.arange(n))
+    return dat
+
+
+def _bootstrap_gof_discrete(rng, N, pz, y, xmin, mmax, cdf, vec, zvec,
+                            log_zvec, **kwargs):
+    # one repetition of the discrete method's bootstrap; returns its min. gof
+    ny = float(len(y))
+    # semi-parametric bootstrap of data
+    n1 = sum(rng.random(N) > pz)
+    q1 = y[numpy.array(numpy.floor(ny * rng.random(n1)),
+                       dtype="int32")]
+    n2 = N - n1
+
+    # simple discrete zeta generator: inverse CDF draw, i.e. the smallest
+    # i >= xmin w/ P(X <= i) >= r, where cdf[i - 1] = P(X <= i)
+    xmin_idx = int(xmin) - 1
+    q2 = xmin + numpy.searchsorted(cdf[xmin_idx:], rng.random(n2))
+    q = numpy.r_[q1, q2]
+
+    # estimate xmin and alpha via GoF-method
+    qmins = numpy.unique(q)
+    qmins = qmins[0:-1]
+    try:
+        qmins = qmins[qmins <= kwargs["limit"]]
+    except KeyError:
+        pass
+    try:
+        qmins = qmins[
+            numpy.array(
+                numpy.unique(
+                    numpy.round(
+                        numpy.linspace(1, len(qmins),
+                                       kwargs["sample"]) - 1
                     )
-                ]
-            except KeyError:
-                pass
-            dat = numpy.array([])
-            qmax = max(q)
-            zq = q
-            for qmin in qmins:
-                zq = zq[zq >= qmin]
-                nq = float(len(zq))
-                slogzq = sum(numpy.log(zq))
-                if nq > 1:
-                    try:
-                        # vectorized version of numerical calculation
-                        L = -nq * numpy.log(zvec) - vec * slogzq  # (3.5) (B.8)
-                    except:
-                        # iterative version (more memory efficient, but slower)
-                        print("except")
-                        L = -numpy.inf * numpy.ones(len(vec))
-                        for k in range(len(vec)):
-                            L[k] = (
-                                -nq * numpy.log(zvec[k]) - vec[k] * slogzq
-                            )  # (3.5) (B.8)
-                    Y, I = L.max(0), L.argmax(0)
-
-                    fit = numpy.cumsum(
-                        (numpy.arange(qmin, qmax + 1) ** -vec[I]) / zvec[I]
-                    )  # P(x)
-                    cdi = numpy.cumsum(
-                        numpy.histogram(zq, numpy.arange(qmin, qmax + 2))[0] /
-                        nq)  # S(x)
-                    dat = numpy.r_[dat, max(abs(fit - cdi))]  # (3.9)
-                else:
-                    dat = numpy.r_[dat, -numpy.inf]
-
-            # -- store distribution of estimated gof values
-            nof = numpy.r_[nof, min(dat)]
-            if not quiet:
-                print("[%i]\tp = %.4f\n" % (B + 1,
-                                            sum(nof >= gof) / float(B + 1)))
-        p = sum(nof >= gof) / float(len(nof))
-
-    return p, gof
+                ),
+                dtype="int32",
+            )
+        ]
+    except KeyError:
+        pass
+    dat = numpy.array([])
+    qmax = max(q)
+    zq = q
+    for qmin in qmins:
+        zq = zq[zq >= qmin]
+        nq = float(len(zq))
+        slogzq = sum(numpy.log(zq))
+        if nq > 1:
+            try:
+                # vectorized version of numerical calculation
+                L = -nq * log_zvec - vec * slogzq  # (3.5) (B.8)
+            except:
+                # iterative version (more memory efficient, but slower)
+                print("except")
+                L = -numpy.inf * numpy.ones(len(vec))
+                for k in range(len(vec)):
+                    L[k] = (
+                        -nq * numpy.log(zvec[k]) - vec[k] * slogzq
+                    )  # (3.5) (B.8)
+            Y, I = L.max(0), L.argmax(0)
+
+            fit = numpy.cumsum(
+                (numpy.arange(qmin, qmax + 1) ** -vec[I]) / zvec[I]
+            )  # P(x)
+            cdi = numpy.cumsum(
+                numpy.histogram(zq, numpy.arange(qmin, qmax + 2))[0] /
+                nq)  # S(x)
+            dat = numpy.r_[dat, max(abs(fit - cdi))]  # (3.9)
+        else:
+            dat = numpy.r_[dat, -numpy.inf]
+
+    return min(dat)
+
+
+def _bootstrap_gofs(gof_fn, args, kwargs, reps, rng=None, seed=None, nproc=1,
+                    gof=None, stop_at=None):
+    """Runs reps repetitions of the bootstrap gof_fn(rng, *args, **kwargs).
+
+    W/o a seed & w/ 1 process, all repetitions draw from the one rng. Else
+    each repetition gets its own child of the seed's SeedSequence, so the
+    gofs only depend on the seed, & not on how the repetitions are split
+    into the contiguous chunks run by each of the nproc processes.
+    """
+    if seed is None and nproc == 1:
+        rng = numpy.random.default_rng() if rng is None else rng
+        return _run_bootstrap(
+            lambda b0, b1: numpy.fromiter((gof_fn(rng, *args, **kwargs)
+                                           for _ in range(b1 - b0)),
+                                          float, b1 - b0),
+            reps, gof, stop_at)
+
+    seed_seq = (seed if isinstance(seed, numpy.random.SeedSequence) else
+                numpy.random.SeedSequence(seed))
+    child_seeds = seed_seq.spawn(reps)
+    run_seeded = partial(_run_seeded_reps, gof_fn, args, kwargs)
+    # NOTE: Pool workers (e.g. those of analyze_multiproc) are daemonic, and
+    # so can't start a nested Pool; their repetitions just run sequentially
+    nproc = min(nproc, reps)
+    if nproc <= 1 or current_process().daemon:
+        return _run_bootstrap(lambda b0, b1: run_seeded(child_seeds[b0:b1]),
+                              reps, gof, stop_at)
+
+    with Pool(processes=nproc) as pool:
+        def run_reps(b0, b1):
+            chunk_size = -(-(b1 - b0) // nproc)
+            return numpy.concatenate(pool.map(
+                run_seeded, [child_seeds[i:min(i + chunk_size, b1)] for i
+                             in range(b0, b1, chunk_size)]))
+        return _run_bootstrap(run_reps, reps, gof, stop_at)
+
+
+def _run_seeded_reps(gof_fn, args, kwargs, child_seeds):
+    return numpy.array([gof_fn(numpy.random.default_rng(cs), *args, **kwargs)
+                        for cs in child_seeds], dtype=float)
+
+
+# sequential testing: # of reps b/w checks of the p-value's conf. interval,
+# & the z-score of that interval; NOTE: 99% b/c of the repeated checks
+_SEQ_TEST_EVERY = 20
+_SEQ_TEST_Z = 2.576
+
+
+def _run_bootstrap(run_reps, reps, gof=None, stop_at=None):
+    # run_reps(b0, b1) returns the gofs of repetitions [b0, b1); these are run
+    # all at once, or, w/ stop_at, in batches until its decision is clear
+    if stop_at is None:
+        return run_reps(0, reps)
+    nof = numpy.empty(reps)
+    n = 0
+    while n < reps:
+        b1 = min(n + _SEQ_TEST_EVERY, reps)
+        nof[n:b1] = run_reps(n, b1)
+        n = b1
+        lo, hi = _wilson_interval(numpy.count_nonzero(nof[:n] >= gof), n)
+        if not lo <= stop_at <= hi:
+            break
+    return nof[:n]
+
+
+def _wilson_interval(k, n, z=_SEQ_TEST_Z):
+    p = k / n
+    denom = 1 + z**2 / n
+    center = (p + z**2 / (2 * n)) / denom
+    half_width = z * numpy.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denom
+    return center - half_width, center + half_width
+
+
+# NOTE: the zeta tables below are cached, as repeated discrete fits (e.g. of
+# different tickers or dates) commonly share the same integer xmin & alphas
+@lru_cache(maxsize=128)
+def _zeta_table(xmin, alphas):
+    zvec = scipy.special.zeta(numpy.array(alphas), xmin)
+    zvec.flags.writeable = False  # b/c shared by all callers
+    return zvec
+
+
+@lru_cache(maxsize=128)
+def _log_zeta_table(xmin, alphas):
+    log_zvec = numpy.log(_zeta_table(xmin, alphas))
+    log_zvec.flags.writeable = False
+    return log_zvec
+
+
+@lru_cache(maxsize=128)
+def _zeta_cdf(xmin, alpha, zeta_xmin, mmax):
+    # cdf[i - 1] = P(X <= i) for i in [1, mmax + 1], w/ P(X <= mmax + 1) := 1
+    pdf = numpy.r_[numpy.zeros(int(xmin) - 1),
+                   (numpy.arange(xmin, mmax + 1) ** -alpha) / zeta_xmin]
+    cdf = numpy.r_[numpy.cumsum(pdf), 1]
+    cdf.flags.writeable = False
+    return cdf
+
@@ -0,0 +1,150 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# m2 (the 2nd central moment) at or below this fraction of the 2nd raw moment
+# is indistinguishable from 0 (i.e. from rounding errors in the power sums),
+# in which case skewness & kurtosis are undefined (as w/ scipy.stats)
+_M2_REL_EPS = 1e3 * np.finfo(float).eps
+
+
+def window_power_sums(X, lo, hi, col_grps):
+    """Power sums Σx^k (k = 0, ..., 4) of the values in rows [lo, hi] of the
+    columns of X, summed over each group of columns, for each subset of the
+    values: (non-NaN, positive, negative); NaNs are ignored.
+
+    X: 2-D array (dates x columns); lo & hi: 1-D arrays of row positions of
+    the (inclusive) bounds of each window; col_grps: the group # of each col
+
+    Returns the power sums, of shape (3, 5, # windows, # groups), of the
+    values shifted by the mean of their subset & group over all rows, & the
+    shifts themselves, of shape (3, # groups)
+    """
+    X = np.asarray(X, dtype=float)
+    col_grps = np.asarray(col_grps)
+    # NOTE: reduceat sums the columns of each group, once they're contiguous
+    order = np.argsort(col_grps, kind='stable')
+    starts = np.flatnonzero(np.diff(col_grps[order], prepend=-1))
+    X = X[:, order]
+
+    isnum = ~np.isnan(X)
+    masks = (isnum, X > 0, X < 0)
+    Xz = np.where(isnum, X, 0.)
+    grp_of_col = np.repeat(np.arange(len(starts)),
+                           np.diff(starts, append=X.shape[1]))
+    sums = np.empty((3, 5, len(lo), len(starts)))
+    shifts = np.empty((3, len(starts)))
+    for s, mask in enumerate(masks):
+        # NOTE: the values are shifted by the mean of their subset & group
+        # over all dates, to limit the cancellation in the central moments
+        cnt = np.add.reduceat(mask.sum(axis=0), starts)
+        tot = np.add.reduceat(np.where(mask, Xz, 0.).sum(axis=0), starts)
+        shifts[s] = np.divide(tot, cnt, out=np.zeros(len(starts)),
+                              where=cnt > 0)
+        Xs = np.where(mask, Xz - shifts[s, grp_of_col], 0.)
+        Xk = mask.astype(float)
+        for k in range(5):
+            if k > 0:
+                Xk = Xk * Xs
+            # window sums as differences of cumulative sums (w/ a 0th row)
+            csum = np.zeros((len(X) + 1, X.shape[1]))
+            np.cumsum(Xk, axis=0, out=csum[1:])
+            wsum = csum[np.asarray(hi) + 1] - csum[np.asarray(lo)]
+            sums[s, k] = np.add.reduceat(wsum, starts, axis=1)
+    return sums, shifts
+
+
+def moments_from_power_sums(sums, shifts):
+    """Returns statistics from the outputs of window_power_sums, as an array
+    of shape (# windows, # groups, 15), ordered as in rstats_collabs:
+    counts (total, zeros, nonzeros), then mean, std-dev (w/ ddof=1), skewness
+    & (excess) kurtosis (both biased) of all, positive & negative values
+    """
+    S0, S1, S2, S3, S4 = np.moveaxis(sums, 1, 0)  # each (3, # win., # grp.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = np.where(S0 > 0, S0, np.nan)
+        mean = S1 / n  # NOTE: of the shifted values
+        r2, r3, r4 = S2 / n, S3 / n, S4 / n  # raw moments
+        m2 = r2 - mean**2
+        m3 = r3 - 3 * mean * r2 + 2 * mean**3
+        m4 = r4 - 4 * mean * r3 + 6 * mean**2 * r2 - 3 * mean**4
+        degenerate = (S0 < 2) | (m2 <= _M2_REL_EPS * r2)
+        stdv = np.where(S0 > 1, np.sqrt(np.maximum(m2, 0) * n / (n - 1)),
+                        np.nan)
+        skew = np.where(degenerate, np.nan, m3 / m2**1.5)
+        kurt = np.where(degenerate, np.nan, m4 / m2**2 - 3)
+    n_all, n_pos, n_neg = S0
+    counts = (n_all, n_all - n_pos - n_neg, n_pos + n_neg)
+    mean = mean + shifts[:, None, :]
+    return np.stack((*counts, *mean, *stdv, *skew, *kurt), axis=-1)
+
+
+def window_means_stds(X, lo, hi):
+    """Means & std-devs (w/ ddof=1) of the rows [lo, hi] of the columns of X,
+    for each window (NaNs ignored), each as an array of shape (# windows,
+    # columns); NaN where a window has too few (i.e. < 1 or < 2) values.
+
+    Computed from running (i.e. cumulative) counts, sums & sums of squares of
+    each column, so each window costs O(1) regardless of its length
+    """
+    X = np.asarray(X, dtype=float)
+    isnum = ~np.isnan(X)
+    cnt = isnum.sum(axis=0)
+    # NOTE: shifted by the col means, to limit the cancellation in variances
+    shift = np.divide(np.where(isnum, X, 0.).sum(axis=0), cnt,
+                      out=np.zeros(X.shape[1]), where=cnt > 0)
+    Xs = np.where(isnum, X - shift, 0.)
+    lo, hi = np.asarray(lo), np.asarray(hi) + 1
+    sums = []
+    for Xk in (isnum.astype(float), Xs, Xs * Xs):
+        csum = np.zeros((len(X) + 1, X.shape[1]))
+        np.cumsum(Xk, axis=0, out=csum[1:])
+        sums.append(csum[hi] - csum[lo])
+    n, S1, S2 = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = S1 / n  # NOTE: of the shifted values
+        var = (S2 - S1 * mean) / (n - 1)
+    return (np.where(n > 0, mean + shift, np.nan),
+            np.where(n > 1, np.sqrt(np.maximum(var, 0)), np.nan))
+
+
+def window_values(X, lo, hi):
+    """The rows [lo, hi] of the columns of X, for each window, as an array of
+    shape (# windows, max. window length, # columns), padded w/ NaNs"""
+    length = np.max(hi - lo) + 1
+    if np.all(hi - lo + 1 == length):  # e.g. rolling windows
+        # NOTE: a strided view of all the windows, so only lo's are gathered
+        wins = sliding_window_view(X, length, axis=0)  # (rows, cols, length)
+        return np.moveaxis(wins, -1, 1)[lo]
+    rows = lo[:, None] + np.arange(length)
+    padded = rows > hi[:, None]
+    V = X[np.minimum(rows, len(X) - 1)]
+    V[padded] = np.nan
+    return V
+
+
+def window_moments(V):
+    """Returns statistics of each row of the 2-D array V (NaNs ignored), as
+    an array of shape (# rows, 15), ordered as for moments_from_power_sums
+    """
+    isnum = ~np.isnan(V)
+    stats = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for s, mask in enumerate((isnum, V > 0, V < 0)):
+            n = mask.sum(axis=1)
+            mean = np.where(mask, V, 0.).sum(axis=1) / n
+            dev = np.where(mask, V - mean[:, None], 0.)
+            dev2 = dev * dev
+            m2 = dev2.sum(axis=1) / n
+            m3 = (dev2 * dev).sum(axis=1) / n
+            m4 = (dev2 * dev2).sum(axis=1) / n
+            # NOTE: same criterion for a 0 variance as w/ scipy.stats
+            degenerate = m2 <= (np.finfo(float).eps * mean)**2
+            stats[s] = (n, mean,
+                        np.where(n > 1, np.sqrt(m2 * n / (n - 1)), np.nan),
+                        np.where(degenerate, np.nan, m3 / m2**1.5),
+                        np.where(degenerate, np.nan, m4 / m2**2 - 3))
+    (n_all, *_), (n_pos, *_), (n_neg, *_) = stats.values()
+    counts = (n_all, n_all - n_pos - n_neg, n_pos + n_neg)
+    return np.column_stack((*counts, *(stats[s][m] for m in range(1, 5)
+                                       for s in range(3))))
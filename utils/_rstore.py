@@ -0,0 +1,188 @@
+import numpy as np
+import pandas as pd
+
+import os
+import json
+import hashlib
+
+
+RSTORE_DIR = 'rtrnstore'  # TODO: refactor PATH into root
+
+
+def calc_returns(pt_i, pt_f, returns_type):
+    """Returns of the type returns_type from the prices pt_i to pt_f"""
+    if returns_type == "raw":
+        return pt_f - pt_i
+    elif returns_type == "relative":
+        return pt_f / pt_i - 1.0
+    elif returns_type == "log":
+        return np.log(pt_f/pt_i)
+    raise ValueError(f"unknown returns type '{returns_type}'")
+
+
+class ReturnsStore:
+    """Persistent on-disk array of the returns of every ticker & date of a DB
+    file (see cli._dbfile.DbFile), for a returns_type & a time lag of tau
+    data pts, each freq days apart; the returns of the 1st tau * freq dates
+    are NaN.
+
+    The returns are computed (only once per DB file & set of the parameters
+    above) while streaming the DB file in chunks of dates, w/ the prices of
+    the last tau * freq dates of each chunk carried over to the next, so
+    neither the prices nor the returns are ever all in memory. They're
+    stored column-major in a .npy file, w/ the key of the DB file (its path,
+    size & mtime), the parameters & the labels in a JSON sidecar; all later
+    runs, & all processes of a run, then map the same .npy file read-only,
+    so its pages are shared through the OS page cache.
+    """
+
+    _CHUNK_ELEMS = 2**20  # max. # of prices read (& returns computed) at once
+
+    def __init__(self, db_file, returns_type, tau, freq=1):
+        self.db_file = db_file
+        self.index, self.columns = db_file.index, db_file.columns
+        self.returns_type = returns_type
+        self.tau, self.freq = tau, freq
+        self.lag = tau * freq  # i.e. in rows of the DB file
+        self.fpath = os.path.realpath(db_file.fpath)
+        path_digest = hashlib.sha256(self.fpath.encode()).hexdigest()
+        stem = os.path.join(RSTORE_DIR,
+                            f'{os.path.basename(self.fpath)}-'
+                            f'{path_digest[:16]}-{returns_type}-tau{tau}-'
+                            f'frq{freq}')
+        self.npy_fname, self.meta_fname = f'{stem}.npy', f'{stem}.json'
+        self._values = None
+
+    def __repr__(self):  # NOTE: also what the settings_digest hashes
+        return (f'{type(self).__name__}({self.npy_fname!r}, '
+                f'{len(self.index)} dates x {len(self.columns)} tickers)')
+
+    def __getstate__(self):
+        # NOTE: a pickled store (e.g. in Pool workers) is only ever read, by
+        # remapping the array the creating process has already opened
+        return {**vars(self), 'db_file': None, '_values': None}
+
+    @property
+    def values(self):
+        """The (dates x tickers) returns, as a read-only memory-mapped array
+        (built 1st, if there's no valid store yet)"""
+        if self._values is None:
+            if self.db_file is None:  # i.e. in a process it was pickled to
+                self._values = np.load(self.npy_fname, mmap_mode='r')
+            else:
+                self._values = self.__load()
+                if self._values is None:
+                    self._values = self.build()
+        return self._values
+
+    def __stat_key(self):
+        stat = os.stat(self.fpath)
+        return {'path': self.fpath, 'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns}
+
+    def __get_meta(self):
+        return {'key': self.__stat_key(),
+                'returns_type': self.returns_type,
+                'tau': self.tau, 'freq': self.freq,
+                'index': self.index.tolist(),
+                'index_name': self.index.name,
+                'columns': self.columns.tolist()}
+
+    def __load(self):
+        try:
+            with open(self.meta_fname, encoding='utf8') as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        # NOTE: an unchanged size & mtime are trusted to mean unchanged
+        # contents (the parsed labels must be unchanged as well)
+        if meta != self.__get_meta():
+            return None
+        try:
+            values = np.load(self.npy_fname, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        if values.shape != (len(self.index), len(self.columns)):
+            return None
+        return values
+
+    def build(self):
+        os.makedirs(RSTORE_DIR, exist_ok=True)
+        # NOTE: the sidecar is removed 1st & rewritten last, so that it only
+        # ever describes a completely written .npy file
+        if os.path.isfile(self.meta_fname):
+            os.remove(self.meta_fname)
+        meta = self.__get_meta()  # i.e. the key of the file as streamed
+        tmp_fname = f'{self.npy_fname}.{os.getpid()}.tmp'
+        # NOTE: column-major, so each ticker's returns are contiguous on disk
+        values = np.lib.format.open_memmap(
+            tmp_fname, mode='w+', fortran_order=True,
+            shape=(len(self.index), len(self.columns)))
+        chunk_rows = max(self._CHUNK_ELEMS // max(len(self.columns), 1), 1)
+        # prices of the dates preceding the current chunk (NaN before 1st)
+        carry = np.full((self.lag, len(self.columns)), np.nan)
+        a = 0
+        for chunk in self.db_file.iter_chunks(chunk_rows):
+            prices = np.vstack((carry, chunk.to_numpy(dtype=float)))
+            values[a:a + len(chunk)] = calc_returns(prices[:-self.lag],
+                                                    prices[self.lag:],
+                                                    self.returns_type)
+            carry = prices[len(prices) - self.lag:]
+            a += len(chunk)
+        assert a == len(self.index)
+        values.flush()
+        del values  # i.e. unmapped, before being moved into place
+        os.replace(tmp_fname, self.npy_fname)
+        tmp_fname = f'{self.meta_fname}.{os.getpid()}.tmp'
+        with open(tmp_fname, 'w', encoding='utf8') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(tmp_fname, self.meta_fname)  # i.e. atomically
+        return np.load(self.npy_fname, mmap_mode='r')
+
+    @staticmethod
+    def __as_slice(posns):
+        # the slice equivalent to the array of posns, if they're equidistant
+        step = posns[1] - posns[0] if len(posns) > 1 else 1
+        if len(posns) > 0 and step > 0 and np.all(np.diff(posns) == step):
+            return slice(posns[0], posns[-1] + 1, step)
+        return posns
+
+    def select(self, tickers, dates):
+        """The returns of the given tickers & dates (as labelled in the DB
+        file), as an array of shape (dates, tickers); a (read-only) view onto
+        the store where possible, i.e. for equidistant dates & tickers"""
+        rows = self.index.get_indexer(dates)
+        cols = self.columns.get_indexer(tickers)
+        assert (rows >= 0).all() and (cols >= 0).all()
+        rows, cols = self.__as_slice(rows), self.__as_slice(cols)
+        if isinstance(cols, slice):
+            return self.values[rows, cols]
+        # NOTE: column-major, as are the values of DFs of computed returns
+        return np.asfortranarray(self.values[rows][:, cols])
+
+
+class StoredReturnsDF:
+    """A DataFrame of returns selected from a ReturnsStore.
+
+    Pickling one only serializes the store & the labels of the selection, so
+    that unpickled copies (e.g. in Pool workers) are rebuilt from the same
+    memory-mapped file, instead of carrying their own copies of the values.
+    """
+
+    def __init__(self, store, dates, columns):
+        self._store = store
+        self._labels = dates, columns
+        self.obj = self.__select()
+
+    def __select(self):
+        dates, columns = self._labels
+        return pd.DataFrame(self._store.select(columns.get_level_values(-1),
+                                               dates),
+                            index=dates, columns=columns, copy=False)
+
+    def __getstate__(self):
+        return {**vars(self), 'obj': None}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.obj = self.__select()
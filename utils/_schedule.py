@@ -0,0 +1,82 @@
+import numpy as np
+
+import os
+import json
+from scipy.optimize import nnls
+
+
+TIMINGS_DIR = 'timings'  # TODO: refactor PATH into root
+
+
+class CostModel:
+    """Linear model of the # of secs an analysis task takes, in terms of the
+    size n of its returns sample (& of how many KS-test bootstraps are run on
+    it, & whether other distros are compared to the PL fit).
+
+    The actual task times of every run are recorded, & the model coefs are
+    refit (by NNLS) to those of previous runs w/ the same fit engine.
+    """
+
+    # (rough) secs: per task, per return, per n*log(n) per KS-test rep, & per
+    # n*log(n) when comparing distros; only their ratios matter for ordering
+    _DEFAULT_COEFS = (1e-3, 2e-6, 3e-7, 3e-6)
+    _MIN_RECORDS = 50      # min. # of recorded task times to refit coefs on
+    _MAX_RECORDS = 10_000  # i.e. only the most recent are kept
+
+    def __init__(self, settings):
+        sa = settings.anal
+        self._ks_iter = (sa.ks_iter if sa.analyze_tails and sa.run_ks_test
+                         else 0)
+        self._compare = int(sa.analyze_tails and sa.compare_distros)
+        kind = sa.fit_engine if sa.analyze_tails else 'null'
+        self.fname = os.path.join(TIMINGS_DIR, f'{kind}.jsonl')
+        self._records = self.__load_records()
+        self._n_loaded = len(self._records)
+        self.coefs = self.__fit_coefs()
+
+    def __load_records(self):
+        if not os.path.isfile(self.fname):
+            return []
+        records = []
+        with open(self.fname, encoding='utf8') as timings:
+            for line in timings:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records[-self._MAX_RECORDS:]
+
+    @staticmethod
+    def _features(n, ks_iter, compare):
+        n = np.asarray(n, dtype=float)
+        nlogn = n * np.log(np.maximum(n, 2))
+        return np.column_stack([np.ones_like(n), n, nlogn * ks_iter,
+                                nlogn * compare])
+
+    def __fit_coefs(self):
+        if len(self._records) < self._MIN_RECORDS:
+            return np.array(self._DEFAULT_COEFS)
+        n, ks_iter, compare, secs = np.array(self._records, dtype=float).T
+        coefs, _ = nnls(self._features(n, ks_iter, compare), secs)
+        # NOTE: fall back when the records can't tell apart the task sizes
+        return coefs if coefs[1:].any() else np.array(self._DEFAULT_COEFS)
+
+    def predict(self, sizes):
+        """Estimates the secs taken by tasks on returns samples of sizes"""
+        return self._features(sizes, self._ks_iter, self._compare) @ self.coefs
+
+    def record(self, size, secs):
+        self._records.append((size, self._ks_iter, self._compare, secs))
+
+    def save(self):
+        if len(self._records) == self._n_loaded:
+            return
+        os.makedirs(TIMINGS_DIR, exist_ok=True)
+        with open(self.fname, 'w', encoding='utf8') as timings:
+            for rec in self._records[-self._MAX_RECORDS:]:
+                timings.write(json.dumps(rec) + '\n')
+
+
+def lpt_order(costs):
+    """Positions of costs ordered longest-first (i.e. the LPT rule)"""
+    return np.argsort(-np.asarray(costs), kind='stable')
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from multiprocessing import shared_memory
+
+
+class SharedPdObj:
+    """A float pandas DataFrame (or Series) w/ its values in shared memory.
+
+    Pickling one only serializes the name of its shared memory block & the
+    labels of its index & columns, so that unpickled copies (e.g. in Pool
+    workers) are rebuilt as zero-copy views onto the same block.
+    """
+
+    def __init__(self, pdobj):
+        values = pdobj.to_numpy(dtype=float)
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=max(values.nbytes, 1))
+        self._owner = True
+        is_series = isinstance(pdobj, pd.Series)
+        self._meta = (values.shape, pdobj.index,
+                      None if is_series else pdobj.columns,
+                      pdobj.name if is_series else None)
+        self.obj = self.__wrap_buffer()
+        self.obj.iloc[...] = values
+
+    def __wrap_buffer(self):
+        shape, index, columns, name = self._meta
+        # NOTE: column-major (as pandas stores a float DF's block), so that
+        # .to_numpy() in the attached processes are also zero-copy views
+        values = np.ndarray(shape, dtype=float, buffer=self._shm.buf,
+                            order='F')
+        return (pd.DataFrame(values, index=index, columns=columns, copy=False)
+                if columns is not None else
+                pd.Series(values, index=index, name=name, copy=False))
+
+    def __getstate__(self):
+        return self._shm.name, self._meta
+
+    def __setstate__(self, state):
+        name, self._meta = state
+        # NOTE: attaching (before py3.13) registers the block w/ the resource
+        # tracker, which Pool workers share w/ (& is cleaned up by) the owner
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._owner = False  # i.e. only the creating process may unlink it
+        self.obj = self.__wrap_buffer()
+
+    def release(self):
+        """Returns a private copy of obj, then frees the shared memory block
+        (which must no longer be referenced by any other views)"""
+        private_copy, self.obj = self.obj.copy(), None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        return private_copy
@@ -1,6 +1,4 @@
 import numpy as np
-import pandas as pd
-# NOTE: if pd.Series replaced, then module no longer depends on pandas
 
 import statistics as st
 import scipy.stats
@@ -9,12 +7,18 @@ from abc import ABC, abstractmethod
 from itertools import product
 
 from powerlaw import Fit
+from ._plfit import (NativeFit, WarmStartFitter, RollingFitter,
+                     ExpandingFitter, fit_columns)
 from ._plpva import plpva
+from ._checkpoint import Checkpoint
+from ._schedule import CostModel, lpt_order
 from .returns import Returns
 from .results import Results
 
+import hashlib
 import sys  # TODO: remove sys module & os.getpid after debugging uses done
 from os import getpid
+from time import perf_counter
 from multiprocessing import Pool
 
 
@@ -33,6 +37,20 @@ class _Analyzer(ABC):
         self.rtn = Returns(settings)
         self.res = Results(settings)
 
+        self._FitEngine = {'powerlaw': Fit,
+                           'native': NativeFit}[self.sa.fit_engine]
+        self._fitters = {}  # stateful fitters, keyed by (group, tail)
+        # warm start tally of the tasks run by Pool workers; see _analyze_block
+        self._worker_warm_tally = np.zeros(2, dtype=int)
+        self._Fitter = ({'rolling': RollingFitter,
+                         'increasing': ExpandingFitter}[self.sa.approach]
+                        if self.sa.incremental_fit else
+                        WarmStartFitter if self.sa.warm_start else None)
+        self._ks_nproc = 1  # see analyze
+        self._ckpt = (Checkpoint(settings, resume=self.sc.resume_analysis)
+                      if self.sc.partial_save_data or self.sc.resume_analysis
+                      else None)
+        self._cost_model = CostModel(settings)
         self._distros_to_compare = {'tpl': 'truncated_power_law',
                                     'exp': 'exponential',
                                     'lgn': 'lognormal'}
@@ -102,8 +120,17 @@ class _Analyzer(ABC):
         data = self.curr_signed_returns
         data = data[np.nonzero(data)]  # only use non-zero elements to do Fit
         xmin = self.__get_xmin()
-        self.curr_fit = Fit(data=data, xmin=xmin,
-                            discrete=self.sa.fit_discretely)
+        if self._Fitter is not None and xmin is None:
+            # NOTE: a fitter's state is only reused for the next date if both
+            # dates are analyzed in the same process (always so w/ 1 proc)
+            grp, _, tail = self.curr_iter_id
+            if (grp, tail) not in self._fitters:
+                radius = self.sa.warm_start or None  # 0 means no warm start
+                self._fitters[grp, tail] = self._Fitter(radius)
+            self.curr_fit = self._fitters[grp, tail].fit(data)
+        else:
+            self.curr_fit = self._FitEngine(data=data, xmin=xmin,
+                                            discrete=self.sa.fit_discretely)
 
     @staticmethod
     def gen_rmsf(mmt_func):     # rmsf: Returns Moments Statistics Functions
@@ -129,7 +156,8 @@ class _Analyzer(ABC):
                 for rstat in self.sd.rstats_collabs}
 
     def __get_curr_tail_stats(self):
-        alpha, xmin, sigma = (getattr(self.curr_fit.power_law, prop)
+        # NOTE: both fit engines expose these 3 attrs on the fit object itself
+        alpha, xmin, sigma = (getattr(self.curr_fit, prop)
                               for prop in ('alpha', 'xmin', 'sigma'))
         elm_in_fit = self.curr_signed_returns >= xmin
         fitted_vec = self.curr_signed_returns[elm_in_fit]
@@ -139,12 +167,37 @@ class _Analyzer(ABC):
         abs_len = len(fitted_vec)
         if self.sa.run_ks_test is True:
             # TODO: try compute ks_pv using MATLAB engine & module, and time
-            ks_pv, _ = plpva(self.curr_signed_returns, xmin, 'reps',
-                             self.sa.ks_iter, 'silent')
+            ks_pv, _, *n_reps = plpva(self.curr_signed_returns, xmin,
+                                      reps=self.sa.ks_iter, quiet=True,
+                                      seed=self.__get_curr_ks_seed(),
+                                      nproc=self._ks_nproc,
+                                      stop_at=self.sa.ks_stop)
+            if n_reps:  # i.e. only w/ --ks-stop
+                ks_reps, = n_reps
+        if self.sa.warm_start:
+            # 0: full scan, 1: warm-started (i.e. approx. xmin), 2: warm start
+            # fell back to a full scan
+            warm_start = sum(getattr(self.curr_fit, flag, False) for flag
+                             in ('warm_started', 'warm_fallback'))
         locs = locals()
         return {('tail-statistics', stat): locs.get(stat) for st_type, stat
                 in self.sd.tstats_collabs if stat in locs}
 
+    def __get_curr_ks_seed(self):
+        if self.sa.ks_seed is None:
+            return None
+        # NOTE: seed keyed by each iter_id elem, so the bootstrap for a given
+        # fit is the same regardless of which process runs it; the group by
+        # (a hash of) its label, as the order of the groups may vary
+        *grp_date, tail = self.curr_iter_id
+        grp, *date = grp_date
+        grp_digest = hashlib.sha256(str(grp).encode()).digest()
+        grp_key = int.from_bytes(grp_digest[:8], 'little')
+        spawn_key = (grp_key,
+                     *(self.sd.anal_dates.get_loc(d) for d in date),
+                     (1 - tail.value) // 2)  # i.e. right: 0, left: 1
+        return np.random.SeedSequence(self.sa.ks_seed, spawn_key=spawn_key)
+
     def __get_curr_logl_stats(self):
         # compute (R, p)-pairs (x3) using powerlaw.Fit.distribution_compare
         logl_stats = {key:
@@ -176,28 +229,35 @@ class _Analyzer(ABC):
                        (col[0],) if self.sa.use_dynamic else
                        ())
             # NOTE: hasnans check below on (<col>, 'rtrn-stats') Rm's redundant
-            # calc only works for 1-proc b/c multiproc only updts res_df at end
-            rstat_uncalcd = self.res.df.loc[idx, top_grp + ('returns-statistics',)].hasnans
+            # calc, e.g. of those already filled by _store_rtrn_stats_in_bulk
+            rstat_uncalcd = self.res.has_nans(idx, top_grp + ('returns-statistics',))
             need_ss = self.sa.calc_rtrn_stats and rstat_uncalcd
 
         return ({top_grp + tuple(ss_key): ss_val
                 for ss_key, ss_val in stcalc_fn().items()}
                 if need_ss else {})
 
-    def _gset_curr_partial_results(self, action):
+    def _get_curr_partial_results(self):
         fstats_map = self.__get_calcd_substats_map('plfit')
         rstats_map = self.__get_calcd_substats_map('returns')
+        return {**fstats_map, **rstats_map}
 
-        # TODO: use np.ndarray instead of pd.Series (wasteful) --> order later
-        curr_part_res_series = pd.Series({**fstats_map, **rstats_map})
+    def _gset_curr_partial_results(self, action):
+        curr_part_res = self._get_curr_partial_results()
 
         idx, _ = self.curr_df_pos
         if action == 'store':
-            self.res.df.loc[idx].update(curr_part_res_series)
-            # TODO: consider using pd.DataFrame.replace(, inplace=True) instead
-            # TODO: can also order stats results first, then assign to DF row
+            task = self._encode_iter_id(self.curr_iter_id)
+            self._store_partial_results(task, idx, curr_part_res)
         elif action == 'return':
-            return idx, curr_part_res_series
+            return idx, curr_part_res
+
+    def _store_partial_results(self, task, idx, part_res):
+        row, cols = self.res.locate(idx, part_res)
+        vals = list(part_res.values())
+        self.res.store_at(row, cols, vals)
+        if self._ckpt is not None:
+            self._ckpt.append(task, row, cols, vals)
 
     # # # orchestration / driver methods # # #
 
@@ -221,39 +281,203 @@ class _Analyzer(ABC):
             except StopIteration:
                 break
 
+    # size of the returns sample(s) analyzed in the current iteration
+    def _get_curr_task_size(self):
+        return len(self.curr_returns_array)
+
+    # iterIds (see Returns.get_returns_by_iterId) of the returns samples an
+    # iteration analyzes; used to estimate its cost b4 it's run
+    @abstractmethod
+    def _get_task_rtrn_ids(self, iter_id):
+        pass
+
+    def _estimate_task_costs(self, iter_ids):
+        sizes = self.rtn.get_returns_sizes()  # NOTE: w/o materializing any
+        return self._cost_model.predict(
+            [sum(sizes[rid] for rid in self._get_task_rtrn_ids(iter_id))
+             for iter_id in iter_ids])
+
     # runs analysis for one iteration of analysis given arbitrary iter_id
-    def _analyze_iter(self, iter_id):  # NOTE: use this to resume computation
+    def _analyze_iter(self, iter_id):
         print(f"### DEBUG: PID {getpid()} analyzing iter {iter_id}", file=sys.stderr)
         self.curr_iter_id = iter_id
         self._run_curr_iter_fitting()
         return self._gset_curr_partial_results('return')
 
+    # iter_ids as compact tuples of the positions of their elems (& back), so
+    # tasks sent to Pool workers are cheap to pickle
+    def _encode_iter_id(self, iter_id):
+        return tuple(self._iter_id_posns[lvl][elem] for lvl, elem
+                     in enumerate(iter_id))
+
+    def _decode_iter_id(self, task):
+        return tuple(level[i] for level, i in zip(self._iter_id_levels, task))
+
+    # partitions the iter_ids (by position) into the tasks sent to workers:
+    # w/ date blocks, each task is a span of consecutive dates of one group
+    # & tail (in date order), otherwise each is a single iter_id
+    def _partition_tasks(self, iter_id_keys):
+        bsize = self.sc.date_block_size
+        if not bsize:
+            return [[i] for i in range(len(iter_id_keys))]
+        dl = self._iter_id_date_lvl
+        spans = {}  # NOTE: product() order keeps each span's dates in order
+        for i, iter_id in enumerate(iter_id_keys):
+            spans.setdefault(iter_id[:dl] + iter_id[dl+1:], []).append(i)
+        return [span[j:j+bsize] for span in spans.values()
+                for j in range(0, len(span), bsize)]
+
     # runs analysis in multiprocessing mode
     def analyze_multiproc(self):
-        # TODO: https://stackoverflow.com/a/52596590/5437918 (use shared DBDFs)
         iter_id_keys = tuple(self.iter_id_keys)
-
-        # TODO: look into Queue & Pipe for sharing data
-        with Pool(processes=self.sc.nproc) as pool:
-            # TODO checkout .map alternatives: .imap, .map_async, etc.
-            restup_ls = [restup for restup in  # TODO: optimize chunksize below
-                         pool.map(self._analyze_iter, iter_id_keys)]
-
-        # TODO: update res_df more efficiently, ex. pd.df.replace(), np.ndarray
-        for restup in restup_ls:
-            idx, res = restup  # if use '+' NOTE that DFs init'd w/ NaNs
-            self.res.df.loc[idx].update(res)
+        if not iter_id_keys:  # i.e. all already done, when resuming
+            return
+        costs = self._estimate_task_costs(iter_id_keys)
+        blocks = self._partition_tasks(iter_id_keys)
+        block_costs = np.array([costs[block].sum() for block in blocks])
+        # NOTE: longest tasks are dispatched 1st, so that no long stragglers
+        # are left running at the end; stateful fitters instead need each
+        # (group, tail)'s dates to be analyzed in order, so w/o date blocks
+        # those keep the product() order
+        if self._Fitter is None or self.sc.date_block_size:
+            order = lpt_order(block_costs)
+            blocks = [blocks[i] for i in order]
+            block_costs = block_costs[order]
+        tasks = [tuple(self._encode_iter_id(iter_id_keys[i]) for i in block)
+                 for block in blocks]
+
+        # NOTE: the returns data is moved into shared memory, & each worker
+        # gets (a copy of) this Analyzer only once, instead of once per task
+        self.rtn.share_memory()
+        try:
+            with Pool(processes=self.sc.nproc, initializer=_init_worker,
+                      initargs=(self,)) as pool:
+                # results are stored as they arrive, in whichever order; the
+                # 1st task of each worker also times the tasks for chunksize
+                n_calib = min(self.sc.nproc, len(tasks))
+                secs_per_cost = []
+                for block_res in pool.imap_unordered(_analyze_block,
+                                                     tasks[:n_calib]):
+                    secs_per_cost.extend(
+                        secs / self._cost_model.predict([size])[0]
+                        for (secs, size), *_ in block_res)
+                    self._store_block_results(block_res)
+                # NOTE: calibration tasks are the longest, so the secs of the
+                # rest are extrapolated from them w/ the cost model
+                task_secs = (np.median(secs_per_cost) *
+                             block_costs[n_calib:].mean()
+                             if len(tasks) > n_calib else 0)
+                chunksize = self._calibrate_chunksize(task_secs,
+                                                      len(tasks) - n_calib)
+                for block_res in pool.imap_unordered(_analyze_block,
+                                                     tasks[n_calib:],
+                                                     chunksize=chunksize):
+                    self._store_block_results(block_res)
+        finally:
+            self.rtn.release_memory()
+            # NOTE: only multiproc runs use (& so record) the task timings
+            self._cost_model.save()
+
+    def _store_block_results(self, block_res):
+        for (secs, size), task, restup, warm_tally in block_res:
+            self._cost_model.record(size, secs)
+            self._store_partial_results(task, *restup)
+            self._worker_warm_tally += warm_tally
+
+    # target # of seconds of work per chunk of tasks sent to a worker, & the
+    # min. # of chunks per process to still leave for balancing the load
+    _CHUNK_SECS = 0.5
+    _MIN_CHUNKS_PER_PROC = 4
+
+    def _calibrate_chunksize(self, task_secs, n_tasks):
+        # NOTE: chunks amortize the IPC overhead of fast tasks, but too large
+        # chunks leave workers idle at the end of the run
+        by_time = self._CHUNK_SECS / max(task_secs, 1e-6)
+        by_load = n_tasks / (self.sc.nproc * self._MIN_CHUNKS_PER_PROC)
+        return max(1, int(min(by_time, by_load)))
 
     # top-level convenience method that autodetects how to run tail analysis
     def analyze(self):
         nproc = self.sc.nproc
+        iter_id_keys = tuple(self.iter_id_keys)
+        self._iter_id_posns = [{elem: i for i, elem in enumerate(level)}
+                               for level in self._iter_id_levels]
+        if self.sc.resume_analysis:
+            iter_id_keys = self._resume_from_checkpoint(iter_id_keys)
+        if self.sa.calc_rtrn_stats and self._store_rtrn_stats_in_bulk():
+            if not self.sa.analyze_tails:
+                iter_id_keys = ()  # i.e. NullAnalyzer has nothing left to do
+        self.iter_id_keys = iter(iter_id_keys)
+        # NOTE: w/ fewer fits than processes, spare cores are better used by
+        # running the fits sequentially, each w/ its KS bootstrap spread over
+        # all of them (Pool workers can't nest their own Pools anyway)
+        if (self.sa.analyze_tails and self.sa.run_ks_test and
+                1 < nproc and len(iter_id_keys) < nproc):
+            self._ks_nproc, nproc = nproc, 1
         # TODO: add other conditions for analyze_sequential (ex. -a static)
-        if nproc == 1:
-            self.analyze_sequential()
-        elif nproc > 1:
-            self.analyze_multiproc()
-        else:  # if 0 or negative number of processors got through to here
-            raise TypeError(f'Cannot perform analysis with {nproc} processes')
+        try:
+            if nproc == 1:
+                self.analyze_sequential()
+            elif nproc > 1:
+                self.analyze_multiproc()
+            else:  # if 0 or negative number of processors got through to here
+                raise TypeError('Cannot perform analysis with '
+                                f'{nproc} processes')
+        finally:  # i.e. also checkpoint what's done when interrupted
+            if self._ckpt is not None:
+                self._ckpt.close()
+        if self.sa.warm_start:
+            self._report_warm_starts()
+
+    # fills in the returns-statistics of all groups & windows (i.e. rows) at
+    # once, so the iterations skip them (see __get_calcd_substats_map); False
+    # if not supported by the Returns' Normalizer
+    def _store_rtrn_stats_in_bulk(self):
+        rstats = self.rtn.get_bulk_rtrn_stats(self.sc.nproc)
+        if rstats is None:
+            return False
+        collabs = [tuple(cl) for cl in self.sd.rstats_collabs]
+        if self.sa.use_dynamic:
+            for g, grp in enumerate(self.sd.grouping_labs):
+                self.res.store_block(self.sd.anal_dates,
+                                     [(grp, *cl) for cl in collabs],
+                                     rstats[:, g])
+        else:
+            self.res.store_block(self.sd.grouping_labs, collabs, rstats[0])
+        print("Returns statistics of all windows computed in bulk")
+        return True
+
+    # restores the results checkpointed by a previous run w/ the same data &
+    # analysis settings, & returns the iter_ids still left to analyze
+    def _resume_from_checkpoint(self, iter_id_keys):
+        # NOTE: stateful fitters (see _fit_curr_data) start afresh on resume,
+        # so warm-started fits may land on different (local) optima
+        done = set()
+        for task, row, cols, vals in self._ckpt.load():
+            self.res.store_at(row, cols, vals)
+            done.add(task)
+        todo = tuple(iter_id for iter_id in iter_id_keys
+                     if self._encode_iter_id(iter_id) not in done)
+        print(f"Resuming from checkpoint '{self._ckpt.fname}': "
+              f"{len(iter_id_keys) - len(todo)} of {len(iter_id_keys)} "
+              "iterations already analyzed")
+        return todo
+
+    # # of warm-started fits (& of those that fell back to a full scan) of
+    # the fitters of this process
+    def _get_warm_tally(self):
+        return np.array([(ftr.n_warm, ftr.n_fallbacks)
+                         for ftr in self._fitters.values()],
+                        dtype=int).reshape(-1, 2).sum(axis=0)
+
+    def _report_warm_starts(self):
+        # NOTE: w/ multiproc the fitters live in the workers, which send the
+        # tallies of each task back w/ its results
+        n_warm, n_fb = self._get_warm_tally() + self._worker_warm_tally
+        if n_warm == 0:
+            return
+        print(f"Warm-started xmin searches: {n_warm}, of which {n_fb} "
+              f"({n_fb / n_warm:.1%}) fell back to a full scan")
 
     def get_resdf(self):
         # TODO: final clean ups of DF for presentation:
@@ -262,28 +486,65 @@ class _Analyzer(ABC):
         return self.res.df
 
 
+# # state & functions of the Pool workers used by analyze_multiproc # #
+
+_worker_analyzer = None
+
+
+def _init_worker(analyzer):
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+# returns (time taken, size), task, results & warm start tally of each task
+def _analyze_block(block):
+    # NOTE: a block's tasks share their stateful fitter (if any), which is
+    # reset at its start, so results don't depend on where blocks are run
+    # (w/ '--warm-start', date blocks are always used; see Settings)
+    if _worker_analyzer.sc.date_block_size:
+        _worker_analyzer._fitters.clear()
+    block_res = []
+    for task in block:
+        t0 = perf_counter()
+        warm_tally = _worker_analyzer._get_warm_tally()
+        iter_id = _worker_analyzer._decode_iter_id(task)
+        restup = _worker_analyzer._analyze_iter(iter_id)
+        secs = perf_counter() - t0
+        warm_tally = _worker_analyzer._get_warm_tally() - warm_tally
+        block_res.append(((secs, _worker_analyzer._get_curr_task_size()),
+                          task, restup, warm_tally))
+    return block_res
+
+
 class StaticAnalyzer(_Analyzer):
 
     def __init__(self, settings):
         super().__init__(settings)
         assert not self.sa.use_dynamic
-        self.iter_id_keys = product(self.sd.grouping_labs,
-                                    self.sa.tails_to_anal)
+        self._iter_id_levels = (self.sd.grouping_labs,
+                                self.sa.tails_to_anal)
+        self.iter_id_keys = product(*self._iter_id_levels)
 
     def _set_curr_input_array(self):  # TODO: pass curr_iter_id as arg???
         lab, tail = self.curr_df_pos = self.curr_iter_id
         self.curr_returns_array = self.rtn.get_returns_by_iterId(lab)
         self.curr_signed_returns = self.curr_returns_array * tail.value
 
+    def _get_task_rtrn_ids(self, iter_id):
+        lab, _ = iter_id
+        return lab,
+
 
 class DynamicAnalyzer(_Analyzer):
 
     def __init__(self, settings):
         super().__init__(settings)
         assert self.sa.use_dynamic
-        self.iter_id_keys = product(self.sd.grouping_labs,
-                                    self.sd.anal_dates,
-                                    self.sa.tails_to_anal)
+        self._iter_id_levels = (self.sd.grouping_labs,
+                                self.sd.anal_dates,
+                                self.sa.tails_to_anal)
+        self._iter_id_date_lvl = 1
+        self.iter_id_keys = product(*self._iter_id_levels)
 
     # TODO: consider vectorizing operations on all tickers
     def _set_curr_input_array(self):  # TODO: pass curr_iter_id as arg???
@@ -292,8 +553,71 @@ class DynamicAnalyzer(_Analyzer):
         self.curr_returns_array = self.rtn.get_returns_by_iterId((sub, date))
         self.curr_signed_returns = self.curr_returns_array * tail.value
 
+    def _get_task_rtrn_ids(self, iter_id):
+        sub, date, _ = iter_id
+        return (sub, date),
+
+
+class BatchedDynamicAnalyzer(DynamicAnalyzer):
+    """Fits the same date & tail of all groups at once, w/ fit_columns"""
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        assert self.sa.batch_fit
+        self._iter_id_levels = (self.sd.anal_dates,
+                                self.sa.tails_to_anal)
+        self._iter_id_date_lvl = 0
+        self.iter_id_keys = product(*self._iter_id_levels)
+
+    def _log_curr_iter(self):
+        date, tail = self.curr_iter_id
+        di = self.sa.get_dyn_lbd(date)
+        n_grps = len(self.sd.grouping_labs)
+        print(f"Analyzing {tail.name.upper()} tail of time series for "
+              f"{n_grps} {self.sd.grouping_type.title()} groups b/w "
+              f"[{di}, {date}]")
+
+    def _set_curr_input_array(self):
+        date, tail = self.curr_iter_id
+        self._batch_returns = [self.rtn.get_returns_by_iterId((grp, date))
+                               for grp in self.sd.grouping_labs]
+        self._batch_signed = [rtrns * tail.value for rtrns
+                              in self._batch_returns]
+
+    def _get_task_rtrn_ids(self, iter_id):
+        date, _ = iter_id
+        return tuple((grp, date) for grp in self.sd.grouping_labs)
+
+    def _get_curr_task_size(self):
+        return sum(len(rtrns) for rtrns in self._batch_returns)
+
+    def _fit_curr_data(self):
+        # NOTE: xmin_rule is always 'clauset' here (see settings validation)
+        self._batch_fits = fit_columns([signed[np.nonzero(signed)] for signed
+                                        in self._batch_signed])
+
+    # merges the stats of all groups into the same results DF row (ie. date)
+    def _get_curr_partial_results(self):
+        batch_iter_id = date, tail = self.curr_iter_id
+        part_res = {}
+        for grp, rtrns, signed, fit in zip(self.sd.grouping_labs,
+                                           self._batch_returns,
+                                           self._batch_signed,
+                                           self._batch_fits):
+            self.curr_iter_id = grp, date, tail
+            self.curr_df_pos = date, (grp, tail)
+            self.curr_returns_array = rtrns
+            self.curr_signed_returns = signed
+            self.curr_fit = fit
+            part_res.update(super()._get_curr_partial_results())
+        self.curr_iter_id = batch_iter_id
+        return part_res
+
 
 class NullAnalyzer(_Analyzer):
+    """Only computes returns statistics, normally for all groups & dates at
+    once (see _store_rtrn_stats_in_bulk), w/o iterating over them at all
+    """
 
     def __init__(self, settings):
         super().__init__(settings)
@@ -301,8 +625,10 @@ class NullAnalyzer(_Analyzer):
         assert self.sa.use_dynamic is True
         assert self.sa.calc_rtrn_stats is True
         self.rtrns_type = settings.rtrn.returns_type
-        self.iter_id_keys = product(self.sd.grouping_labs,
-                                    self.sd.anal_dates)
+        self._iter_id_levels = (self.sd.grouping_labs,
+                                self.sd.anal_dates)
+        self._iter_id_date_lvl = 1
+        self.iter_id_keys = product(*self._iter_id_levels)
 
     def _log_curr_iter(self):
         sub, date = self.curr_iter_id
@@ -317,6 +643,9 @@ class NullAnalyzer(_Analyzer):
         self.curr_df_pos = (date, sub)
         self.curr_returns_array = self.rtn.get_returns_by_iterId((sub, date))
 
+    def _get_task_rtrn_ids(self, iter_id):
+        return iter_id,
+
     def _run_curr_iter_fitting(self):
         self._log_curr_iter()
         self._set_curr_input_array()
@@ -325,8 +654,9 @@ class NullAnalyzer(_Analyzer):
 # wrapper func: instantiate correct Analyzer type and run tail analysis
 def analyze_tail(settings):
     if settings.anal.analyze_tails:
-        Analyzer = (DynamicAnalyzer if settings.anal.use_dynamic else
-                    StaticAnalyzer)
+        Analyzer = (StaticAnalyzer if not settings.anal.use_dynamic else
+                    BatchedDynamicAnalyzer if settings.anal.batch_fit else
+                    DynamicAnalyzer)
     else:
         Analyzer = NullAnalyzer
     analyzer = Analyzer(settings)
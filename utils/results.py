@@ -8,7 +8,7 @@ class Results:
         self.sd = settings.data
         self.sa = settings.anal
 
-        self.df = self.initialize()
+        self.initialize()
 
     def __make_rtrns_df(self, ridx):
         # Ridx: COLUMN index for returns-statistics
@@ -30,7 +30,7 @@ class Results:
         # TODO: add col_idx name 'category' for moments, tails, tstat, logl lvl
         #       consider using input filename as col_idx name; e.g. dbMarkitUS
 
-    def _init_static(self):
+    def _make_row_index(self):
         # gixn: grouping index name
         self._gixn = self.sd.grouping_type
         # ridx: ROW index
@@ -39,8 +39,9 @@ class Results:
                      self._gixn.pluralize())
         ridx_labs = (self.sd.anal_dates if self.sa.use_dynamic
                      else self.sd.grouping_labs)
-        ridx = pd.Index(ridx_labs, name=ridx_name)
+        return pd.Index(ridx_labs, name=ridx_name)
 
+    def _init_static(self, ridx):
         single_sheet_df = []
         if self.sa.calc_rtrn_stats:  # add df_rtrn if returns-statistics req'd
             df_rtrns = self.__make_rtrns_df(ridx)
@@ -53,14 +54,60 @@ class Results:
     # TODO look into pd.concat alternatives
     # https://pandas.pydata.org/pandas-docs/stable/user_guide/merging.html
 
-    def _init_dynamic(self):
-        df_sub = self._init_static()
+    def _init_dynamic(self, ridx):
+        df_sub = self._init_static(ridx)
         return pd.concat({sub: df_sub for sub in self.sd.grouping_labs},
                          axis=1, names=(self._gixn,))
 
     def initialize(self):
-        return (self._init_dynamic() if self.sa.use_dynamic else
-                self._init_static())
+        # NOTE: results are stored by position into a dense array, & the
+        # labelled DF is only built from it once it's needed (see .df); the
+        # templates below are used for their (row-less) column index only
+        ridx = self._make_row_index()
+        cidx = (self._init_dynamic(ridx[:0]) if self.sa.use_dynamic else
+                self._init_static(ridx[:0])).columns
+        self._values = np.full((len(ridx), len(cidx)), np.nan)
+        self._ridx, self._cidx = ridx, cidx
+        self._row_posns = {lab: i for i, lab in enumerate(ridx)}
+        self._col_posns = {lab: j for j, lab in enumerate(cidx)}
+        self._col_grp_posns = {}  # lazily filled by has_nans
+        self._df = None
+
+    @property
+    def df(self):
+        if self._df is None:
+            # NOTE: not a copy, so stats stored afterwards still show up
+            self._df = pd.DataFrame(self._values, index=self._ridx,
+                                    columns=self._cidx, copy=False)
+        return self._df
+
+    def locate(self, idx, part_res):
+        """Gets the positions of row idx & of the column labels of part_res"""
+        return self._row_posns[idx], [self._col_posns[col] for col in part_res]
+
+    def store(self, idx, part_res):
+        """Writes the {column label: value} stats of part_res into row idx"""
+        self.store_at(*self.locate(idx, part_res), list(part_res.values()))
+
+    def store_at(self, row, cols, vals):
+        self._values[row, cols] = vals
+
+    def store_block(self, idxs, cols, vals):
+        """Writes the 2-D vals into the rows idxs & the columns labelled cols"""
+        rows = [self._row_posns[idx] for idx in idxs]
+        cols = [self._col_posns[col] for col in cols]
+        self._values[np.ix_(rows, cols)] = vals
+
+    def has_nans(self, idx, col_grp):
+        """Checks for NaNs in row idx, amongst the columns labelled by the
+        (leading) label(s) col_grp"""
+        if col_grp not in self._col_grp_posns:
+            n = len(col_grp)
+            self._col_grp_posns[col_grp] = [j for col, j in
+                                            self._col_posns.items()
+                                            if col[:n] == col_grp]
+        cols = self._col_grp_posns[col_grp]
+        return np.isnan(self._values[self._row_posns[idx], cols]).any()
 
     def _drop_empty_column_level(self):
         lvls2drop = [l for l, lvl in enumerate(self.df.columns.levels)
@@ -1,7 +1,15 @@
 import numpy as np
+import pandas as pd
 
 from abc import ABC, abstractmethod
 
+from ._shmem import SharedPdObj
+from ._rstore import calc_returns, StoredReturnsDF
+from ._rstats import (window_power_sums, moments_from_power_sums,
+                      window_means_stds, window_values, window_moments)
+
+from multiprocessing import Pool
+
 
 class Returns:
 
@@ -29,14 +37,8 @@ class Returns:
         # TODO: move above printing into verbosity logging
 
         def get_returns(series):  # calculates returns for a series
-            pt_i = series[:-tau]
-            pt_f = series[tau:]
-            if self.sr.returns_type == "raw":
-                returns = pt_f - pt_i
-            elif self.sr.returns_type == "relative":
-                returns = pt_f / pt_i - 1.0
-            elif self.sr.returns_type == "log":
-                returns = np.log(pt_f/pt_i)
+            returns = calc_returns(series[:-tau], series[tau:],
+                                   self.sr.returns_type)
             return np.hstack((nan_pad, returns))
 
         p_len = len(self.sd.price_dbdf)
@@ -44,6 +46,11 @@ class Returns:
             ('cannot calculate returns from time series price data of length '
              f'{p_len} using tau/delta of {tau} days')
 
+        if self.sr.rtrn_store is not None:  # i.e. w/ --stream-returns
+            return StoredReturnsDF(self.sr.rtrn_store,
+                                   self.sd.price_dbdf.index[tau:],
+                                   self.sd.price_dbdf.columns)
+
         returns_df = self.sd.price_dbdf.apply(get_returns, raw=True).iloc[tau:]
 
         # TODO: can add below info as DEBUG logging
@@ -60,6 +67,21 @@ class Returns:
     def get_returns_by_iterId(self, iterId):
         return self.normalizer.get_returns_array(iterId)
 
+    # see _Normalizer.get_bulk_rtrn_stats
+    def get_bulk_rtrn_stats(self, nproc=1):
+        return self.normalizer.get_bulk_rtrn_stats(nproc)
+
+    # see _Normalizer.get_returns_sizes
+    def get_returns_sizes(self):
+        return self.normalizer.get_returns_sizes()
+
+    # see _Normalizer.share_memory
+    def share_memory(self):
+        self.normalizer.share_memory()
+
+    def release_memory(self):
+        self.normalizer.release_memory()
+
 
 class _Normalizer(ABC):
     """NOTE: in all cases, if neither standardize nor absolutize is True, then
@@ -70,12 +92,153 @@ class _Normalizer(ABC):
         self.sd = settings.data
         self.sr = settings.rtrn
         self.sa = settings.anal
+        self._stored = {}  # i.e. attrs read from a ReturnsStore
+        if isinstance(returns_df, StoredReturnsDF):
+            self._stored['returns_df'] = returns_df
+            returns_df = returns_df.obj
         self.returns_df = returns_df
+        self._shared = {}
+        self._win_arrs = None  # see DynamicNormalizer._get_window_arrays
+
+    # attrs holding the bulk of the data, i.e. the returns & their moments
+    _bulk_attrs = ('returns_df', 'means', 'stds', 'stdzd_cols_df')
+
+    def share_memory(self):
+        """Moves the bulk data into shared memory blocks, so that pickled
+        copies of the Normalizer (i.e. those sent to Pool workers) simply
+        attach to those blocks, instead of carrying their own copies; the
+        data read from a ReturnsStore is already shared (via its file)
+        """
+        for attr in self._bulk_attrs:
+            pdobj = getattr(self, attr, None)
+            if (pdobj is not None and attr not in self._shared and
+                    attr not in self._stored):
+                self._shared[attr] = SharedPdObj(pdobj)
+                setattr(self, attr, self._shared[attr].obj)
+        self._win_arrs = None
+
+    def release_memory(self):
+        self._win_arrs = None
+        for attr, shared in self._shared.items():
+            setattr(self, attr, None)  # drop the views before the release
+            setattr(self, attr, shared.release())
+        self._shared = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attr in (*self._shared, *self._stored):
+            del state[attr]  # pickled by the SharedPdObj/StoredReturnsDF
+        state['_win_arrs'] = None  # i.e. rebuilt by each process as needed
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for attr, shared in {**self._shared, **self._stored}.items():
+            setattr(self, attr, shared.obj)
 
     @abstractmethod
     def _get_returns_PdObj(self, iterId):
         pass
 
+    # row posns of the (inclusive) bounds of each window of returns analyzed
+    @abstractmethod
+    def _get_window_bounds(self):
+        pass
+
+    # means & std-devs (per window & col) the returns are standardized w/
+    @abstractmethod
+    def _get_window_stdz_params(self):
+        pass
+
+    # max. # of values in the windows to normalize at once, & the min. # of
+    # values in all windows for it to be worth spreading the work over a Pool
+    _CHUNK_ELEMS = 2**22
+    _POOL_MIN_ELEMS = 2**26
+
+    def get_bulk_rtrn_stats(self, nproc=1):
+        """Computes the returns statistics of every window & group at once;
+        the result has the shape (# windows, # groups, # rstats), or is None
+        when not supported
+        """
+        cols = self.returns_df.columns
+        col_grps = self.sd.grouping_labs.get_indexer(cols.get_level_values(0))
+        n_grps = len(self.sd.grouping_labs)
+        if not set(col_grps) == set(range(n_grps)):
+            return None  # i.e. not all cols belong to some group & vice versa
+        lo, hi = self._get_window_bounds()
+
+        if not (self.sr.standardize or self.sr.absolutize):
+            # NOTE: w/o normalization, the window sums of powers of the
+            # returns suffice, which only takes O(# dates x # cols)
+            sums, shifts = window_power_sums(self.returns_df.to_numpy(),
+                                             lo, hi, col_grps)
+            return moments_from_power_sums(sums, shifts)
+
+        # normalized returns depend on their window, so each is materialized
+        self._bulk_bounds = lo, hi
+        self._bulk_col_grps = col_grps
+        self._bulk_stdz = (self._get_window_stdz_params()
+                           if self.sr.standardize else None)
+        n_elems = len(lo) * (np.max(hi - lo) + 1) * len(cols)
+        if nproc > 1 and n_grps > 1 and n_elems >= self._POOL_MIN_ELEMS:
+            self.share_memory()
+            try:
+                with Pool(processes=nproc, initializer=_init_worker,
+                          initargs=(self,)) as pool:
+                    grp_stats = pool.map(_get_grp_window_stats,
+                                         range(n_grps))
+            finally:
+                self.release_memory()
+        else:
+            grp_stats = [self._get_grp_window_stats(g)
+                         for g in range(n_grps)]
+        return np.stack(grp_stats, axis=1)
+
+    def _get_grp_window_stats(self, g):
+        lo, hi = self._bulk_bounds
+        cols = np.flatnonzero(self._bulk_col_grps == g)
+        X = self.returns_df.to_numpy()[:, cols]
+        if self.sr.standardize:
+            means, stds = (np.asarray(p, dtype=float)[:, cols] for p
+                           in self._bulk_stdz)
+        win_len = np.max(hi - lo) + 1
+        step = max(1, self._CHUNK_ELEMS // (win_len * len(cols)))
+        grp_stats = np.empty((len(lo), 15))
+        for i in range(0, len(lo), step):
+            win = slice(i, i + step)
+            V = window_values(X, lo[win], hi[win])
+            if self.sr.standardize:
+                V = (V - means[win, None]) / stds[win, None]
+            if self.sr.absolutize:
+                V = np.abs(V)
+            V = V.reshape(len(V), -1)
+            if self.sr.norm_after:  # i.e. as __normalize_numpy, but by row
+                if self.sr.standardize:
+                    V = ((V - np.nanmean(V, axis=1, keepdims=True)) /
+                         np.nanstd(V, axis=1, ddof=1, keepdims=True))
+                if self.sr.absolutize:
+                    V = np.abs(V)
+            grp_stats[win] = window_moments(V)
+        return grp_stats
+
+    def _get_window_sizes(self):
+        # the # of non-NaN returns in each window (row) & group (col), in
+        # O(# dates x # cols), from the cumulative NaN-counts of each col
+        X = self.returns_df.to_numpy()
+        nan_cnts = np.zeros((len(X) + 1, X.shape[1]), dtype=np.int64)
+        np.cumsum(np.isnan(X), axis=0, out=nan_cnts[1:])
+        lo, hi = self._get_window_bounds()
+        col_sizes = (hi - lo + 1)[:, None] - (nan_cnts[hi + 1] - nan_cnts[lo])
+        cols = self.returns_df.columns.get_level_values(0)
+        return np.stack([col_sizes[:, cols == grp].sum(axis=1)
+                         for grp in self.sd.grouping_labs], axis=1)
+
+    @abstractmethod
+    def get_returns_sizes(self):
+        """The lengths of the arrays get_returns_array returns, by iterId,
+        computed w/o materializing (nor normalizing) the returns"""
+        pass
+
     def __normalize_numpy(self, X):  # X must be a numpy.ndarray
         if self.sr.standardize:
             X = (X - X.mean()) / X.std(ddof=1)
@@ -83,12 +246,14 @@ class _Normalizer(ABC):
             X = np.abs(X)
         return X
 
+    # the flattened & NaN-free (but possibly normalized) returns of iterId
+    def _get_window_returns(self, iterId):
+        rtrn = self._get_returns_PdObj(iterId).to_numpy().flatten()
+        return rtrn[~np.isnan(rtrn)]
+
     def get_returns_array(self, iterId):
         # TODO: implement std/abs for when target is 'tail' in individual mode
-
-        # TODO optimize below: no need to .flatten() when not analyze_group??
-        rtrn = self._get_returns_PdObj(iterId).to_numpy().flatten()
-        rtrn = rtrn[~np.isnan(rtrn)]
+        rtrn = self._get_window_returns(iterId)
 
         # normalize after grouping in -G mode
         if self.sr.norm_after:
@@ -121,6 +286,16 @@ class StaticNormalizer(_Normalizer):
 
     # FIXME/TODO: implement std/abs when target is 'tail' in individual mode
 
+    def _get_window_bounds(self):  # i.e. the whole series
+        return np.array([0]), np.array([len(self.returns_df) - 1])
+
+    def get_returns_sizes(self):
+        sizes, = self._get_window_sizes()
+        return dict(zip(self.sd.grouping_labs, sizes.tolist()))
+
+    def _get_window_stdz_params(self):
+        return self.means.to_numpy()[None], self.stds.to_numpy()[None]
+
 
 class DynamicNormalizer(_Normalizer):
 
@@ -130,25 +305,18 @@ class DynamicNormalizer(_Normalizer):
 
         self.dates = self.returns_df.index
 
-        self._win_type = {'rolling': 'rolling', 'increasing': 'expanding'}.get(self.sa.approach)
-        self.rtrn_window = getattr(self.returns_df,
-                                   self._win_type)(self.sr.dyn_win_size)
-
         if self.sr.standardize:  # TODO: calc always if getting moments here
             # means & stds should be Pandas DFs (1 per date & per ticker)
-            self.means = self.__get_window_stat('mean')
-            self.stds = (self.__get_window_stat('std')
-                         if len(self.returns_df) > 1 else None)
-            # TODO/FIXME: add standardization for return window w/ NaN values
+            self.means, self.stds = self._get_window_stats()
 
-    def __get_window_stat(self, stat):
-        window_stat = getattr(self.rtrn_window, stat)().dropna()
-        assert len(window_stat) == len(self.sd.anal_dates),\
-            (f'cannot calculate suitable {stat.upper()}s for analysis dates '
-             f"[{', '.join(self.sd.anal_dates)}] from {self._win_type} "
-             f'window of minimum size {self.sr.dyn_win_size}, constructed '
-             f'from DataFrame below:\n\n{self.returns_df}\n')
-        return window_stat
+    def _get_window_stats(self):
+        # NOTE: NaNs are ignored (as w/ StaticNormalizer), rather than making
+        # the stats of every window that contains one NaN too
+        lo, hi = self._get_window_bounds()
+        means, stds = window_means_stds(self.returns_df.to_numpy(), lo, hi)
+        return (pd.DataFrame(stat, index=self.sd.anal_dates,
+                             columns=self.returns_df.columns)
+                for stat in (means, stds))
 
     def _get_lookback_label(self, date):
         lkb = (self.dates.get_loc(date) - self.sr.dyn_win_size + 1
@@ -156,6 +324,70 @@ class DynamicNormalizer(_Normalizer):
         assert lkb >= 0  # this necessarily must be True, otherwise bug
         return self.dates[lkb]
 
+    def _get_window_bounds(self):
+        hi = self.returns_df.index.get_indexer(self.sd.anal_dates)
+        lo = (hi - self.sr.dyn_win_size + 1 if self.sa.approach == 'rolling'
+              else np.zeros_like(hi))
+        assert (lo >= 0).all()  # this necessarily must be True, otherwise bug
+        assert (hi - lo + 1 >= self.sr.dyn_win_size).all(),\
+            (f'cannot construct {self.sa.approach} windows of minimum size '
+             f'{self.sr.dyn_win_size} for analysis dates '
+             f"[{', '.join(self.sd.anal_dates)}] from DataFrame below:"
+             f'\n\n{self.returns_df}\n')
+        return lo, hi
+
+    def _get_window_stdz_params(self):
+        return (self.means.loc[self.sd.anal_dates].to_numpy(),
+                self.stds.loc[self.sd.anal_dates].to_numpy())
+
+    def get_returns_sizes(self):
+        sizes = self._get_window_sizes()
+        return {(grp, date): size for date, row
+                in zip(self.sd.anal_dates, sizes.tolist())
+                for grp, size in zip(self.sd.grouping_labs, row)}
+
+    def _get_window_arrays(self):
+        """Positional counterparts of the labelled returns data, built once
+        per process: the returns (as a column-major array, so that each col's
+        windows are contiguous), their NaN-mask & cumulative NaN-counts, the
+        bounds of each date's window, the cols of each group & the window
+        means & std-devs (if standardized)
+        """
+        if self._win_arrs is None:
+            X = np.asfortranarray(self.returns_df.to_numpy(dtype=float))
+            isnum = ~np.isnan(X)
+            nan_cnts = np.zeros((len(X) + 1, X.shape[1]), dtype=np.int64)
+            np.cumsum(~isnum, axis=0, out=nan_cnts[1:])
+            cols = self.returns_df.columns.get_level_values(0)
+            grp_cols = {grp: np.flatnonzero(cols == grp)
+                        for grp in self.sd.grouping_labs}
+            # NOTE: single cols are indexed by int, so their windows are views
+            grp_cols = {grp: c[0] if len(c) == 1 else c
+                        for grp, c in grp_cols.items()}
+            date_posns = {d: i for i, d in enumerate(self.sd.anal_dates)}
+            stdz = (self._get_window_stdz_params() if self.sr.standardize
+                    else None)
+            self._win_arrs = (X, isnum, nan_cnts, self._get_window_bounds(),
+                              date_posns, grp_cols, stdz)
+        return self._win_arrs
+
+    def _get_window_returns(self, iterId):
+        group, date = iterId
+        (X, isnum, nan_cnts, (lo, hi), date_posns, grp_cols,
+         stdz) = self._get_window_arrays()
+        i, c = date_posns[date], grp_cols[group]
+        win = slice(lo[i], hi[i] + 1)
+        rtrn = X[win, c]
+        if self.sr.standardize:
+            means, stds = stdz
+            rtrn = (rtrn - means[i, c]) / stds[i, c]
+        if self.sr.absolutize:
+            rtrn = np.abs(rtrn)
+        # NOTE: both of the below flatten by row, as does .to_numpy().flatten()
+        if np.any(nan_cnts[win.stop, c] != nan_cnts[win.start, c]):
+            return rtrn[isnum[win, c]]
+        return rtrn.ravel()
+
     def _get_returns_PdObj(self, iterId):
         group, date = iterId
         lkbd = self._get_lookback_label(date)  # lookback date for returns_win
@@ -175,19 +407,35 @@ class MonthlyNormalizer(DynamicNormalizer):
         assert self.sa.approach == 'monthly'
 
         if self.sr.standardize:  # TODO: calc always if getting moments here
-            # initialize 2 DFs for storing the means & std-devs
-            self.means = self.returns_df.loc[self.sd.anal_dates]
-            self.stds = self.returns_df.loc[self.sd.anal_dates]
-            for date in self.sd.anal_dates:
-                _, d_i, d_f = self.sr.monthly_bounds[date[3:]]
-                rtdf_by_month = self.returns_df.loc[d_i:d_f]
-                self.means.loc[date] = rtdf_by_month.mean(axis=0)
-                self.stds.loc[date] = rtdf_by_month.std(axis=0)
+            # means & std-devs of each month (i.e. of its window's returns)
+            self.means, self.stds = self._get_window_stats()
 
     def _get_lookback_label(self, date):
         mmyyyy = date[3:]
         return self.sr.monthly_bounds[mmyyyy][1]
 
+    def _get_window_bounds(self):
+        dates = self.returns_df.index
+        lkbds = [self._get_lookback_label(d) for d in self.sd.anal_dates]
+        lo = dates.get_indexer(lkbds)
+        hi = dates.get_indexer(self.sd.anal_dates)
+        assert (lo >= 0).all() and (hi >= lo).all()
+        return lo, hi
+
+
+# # state & functions of the Pool workers used by get_bulk_rtrn_stats # #
+
+_worker_normalizer = None
+
+
+def _init_worker(normalizer):
+    global _worker_normalizer
+    _worker_normalizer = normalizer
+
+
+def _get_grp_window_stats(g):
+    return _worker_normalizer._get_grp_window_stats(g)
+
 
 class ReturnsIter:
 
@@ -6,6 +6,9 @@ from types import SimpleNamespace
 from statistics import NormalDist
 from itertools import product
 
+from ._plfit import WarmStartFitter
+from ._rstore import ReturnsStore
+
 
 class Settings:
 
@@ -19,6 +22,8 @@ class Settings:
         self._postprocess_specific_options()
         self._gset_tail_settings()
         self._gset_dbdf_attrs()
+        if self.warm_start and self.nproc > 1:
+            self._gset_warm_start_date_blocks()  # must aftr _gset_dbdf_attrs
 
         # domain-, functionality- & usecase- specific settings
         self._gset_grouping_info()  # must be called after _gset_dbdf_attrs()
@@ -69,9 +74,29 @@ class Settings:
                               self.analyze_group)
         self._full_dates = self.full_dbdf.index
         self._postprocess_approach_args_()
+        if self.stream_returns:  # NOTE: shared w/ any precompute Settings
+            self.rtrn_store = self._user_inputs.setdefault(
+                'rtrn_store', ReturnsStore(self.db_file, self.returns_type,
+                                           self.tau, self._frq or 1))
         self.fit_discretely = True if not self.data_is_continuous else False
+        if self.fit_discretely and self.fit_engine == 'native':
+            from warnings import warn
+            warn("the 'native' fit engine only supports continuous data; "
+                 "using '--fit-engine powerlaw' for discrete data instead")
+            self.fit_engine = 'powerlaw'
 
         self.xmin_rule, self.xmin_qnty = self.xmin_args
+        if self.batch_fit:
+            self._validate_batch_fit()
+        if self.incremental_fit:
+            self._validate_incremental_fit()
+        if self.warm_start:
+            self._validate_warm_start()
+        if self.date_block_size and not self.use_dynamic:
+            from warnings import warn
+            warn("'--date-blocks' requires '-a rolling|increasing|monthly'; "
+                 "analyzing each iteration as its own task instead")
+            self.date_block_size = None
         self._tst_map = {Tail.right: 'STP', Tail.left: 'STN'}  # for xmins_file
         self._tpct_map = {Tail.right: 'PCTP', Tail.left: 'PCTN'}  # pct xmins_f
         if self.xmin_rule == 'average':
@@ -83,6 +108,61 @@ class Settings:
             self.norm_target = 'series' if self.norm_target else 'tail'
         self.run_ks_test = False if self.ks_iter <= 0 else self.run_ks_test
 
+    def _validate_incremental_fit(self):
+        reqs = {"'--fit-engine native'": self.fit_engine == 'native',
+                "'-a rolling|increasing'": self._smooth_dynamic,
+                "'-x clauset'": self.xmin_rule == 'clauset',
+                "'--no-std'": not self.standardize}
+        unmet = [opt for opt, met in reqs.items() if not met]
+        if unmet:
+            from warnings import warn
+            warn(f"'--incremental' requires {', '.join(unmet)}; "
+                 "fitting every window from scratch instead")
+            self.incremental_fit = False
+
+    def _validate_warm_start(self):
+        reqs = {"'--fit-engine native'": self.fit_engine == 'native',
+                "'-a rolling|increasing|monthly'": self.use_dynamic,
+                "'-x clauset'": self.xmin_rule == 'clauset',
+                "'--no-batch'": not self.batch_fit}
+        unmet = [opt for opt, met in reqs.items() if not met]
+        if unmet:
+            from warnings import warn
+            warn(f"'--warm-start' requires {', '.join(unmet)}; "
+                 "scanning all candidate xmins instead")
+            self.warm_start = 0
+
+    # NOTE: w/o date blocks, the dates of each group & tail are spread over
+    # the Pool workers in any order, so each date's warm start would be from
+    # whichever date its worker happened to analyze last
+    def _gset_warm_start_date_blocks(self):
+        if self.date_block_size:
+            return
+        # blocks are a multiple of the fitters' full rescan period, so they
+        # start w/ the same full scans as w/ a single process, & the results
+        # don't depend on the # of processes
+        k = WarmStartFitter.RESCAN_EVERY
+        dates_per_proc = -(-len(self.anal_dates) // self.nproc)  # i.e. ceil
+        self.date_block_size = k * -(-dates_per_proc // k)
+        from warnings import warn
+        warn(f"'--warm-start' w/ '-N {self.nproc}' requires '--date-blocks'; "
+             f"using '--date-blocks {self.date_block_size}'")
+
+    def _validate_batch_fit(self):
+        reqs = {"'--fit-engine native'": self.fit_engine == 'native',
+                "'-a rolling|increasing|monthly'": self.use_dynamic,
+                "'-x clauset'": self.xmin_rule == 'clauset'}
+        unmet = [opt for opt, met in reqs.items() if not met]
+        from warnings import warn
+        if unmet:
+            warn(f"'--batch' requires {', '.join(unmet)}; "
+                 "fitting each group separately instead")
+            self.batch_fit = False
+        elif self.incremental_fit:
+            warn("'--batch' & '--incremental' are mutually exclusive; "
+                 "using '--batch' only")
+            self.incremental_fit = False
+
     def _gset_tail_settings(self):
         """Compute settings relevant to tail selection
         """
@@ -128,22 +208,29 @@ class Settings:
 
     __gbdl = __get_back_date_label  # alias for convenience
 
+    # helper for the (positional) slice of dates_ix from date_i to date_f
+    @staticmethod
+    def __get_date_posns_slice(dates_ix, date_i, date_f, step=None):
+        return slice(dates_ix.get_loc(date_i), dates_ix.get_loc(date_f) + 1,
+                     step)
+
     # helper for correctly extending back DF's date-range when use_dynamic
     def __dynamize_ts_df(self, ts_df, back_date, end_date=None):
         #  assert self.use_dynamic
         assert self._smooth_dynamic
         end_date = end_date or self.date_f
-        dynamized_df = ts_df.loc[back_date:end_date]
+        dates = ts_df.index
+        i, f = dates.get_loc(back_date), dates.get_loc(end_date)
         if self._frq > 1:
-            # slice backwards from date_i to ensure date_i is part of final DF
-            back_slice = dynamized_df.loc[self.date_i::-self._frq]
-            fore_slice = dynamized_df.loc[self.date_i::self._frq]
-            dynamized_df = pd.concat((back_slice[::-1], fore_slice[1:]))
-        return dynamized_df
+            # start at an offset from date_i that's a multiple of _frq, to
+            # ensure date_i is part of final DF
+            i += (dates.get_loc(self.date_i) - i) % self._frq
+        return ts_df.iloc[i:f + 1:self._frq]
 
     def _gset_dbdf_attrs(self):
         # Note on dbdf distinctions:
-        # - full_dbdf: unfiltered DataFrame as fully loaded from input DB_FILE
+        # - full_dbdf: DataFrame as loaded from input DB_FILE, i.e. only w/
+        #   the tickers & the range of dates (incl. lookbacks) to be analyzed
         # - _tickers_dbdf: filtered by tickers (columns); has all dates (index)
         # - static_dbdf: filtered _tickers_dbdf w/ given date range to analyze
         # - dynamic_dbdf: has data going back to the earliest lookback date
@@ -152,7 +239,8 @@ class Settings:
         self._tickers_dbdf = self.full_dbdf[self.tickers]
         if self.analyze_group:
             self._partition_tickers_dbdf()
-        static_dbdf = self._tickers_dbdf.loc[self.date_i:self.date_f:self._frq]
+        static_dbdf = self._tickers_dbdf.iloc[self.__get_date_posns_slice(
+            self._tickers_dbdf.index, self.date_i, self.date_f, self._frq)]
         self.anal_dates = static_dbdf.index
         if self.approach == 'monthly':  # use only the last date of each month
             last_day_in_month_posn = [self.anal_dates.get_loc(mb[-1]) for mb
@@ -166,6 +254,7 @@ class Settings:
             q, r = divmod(self._lookback, self._frq)
             self.dyn_win_size = q + bool(r) - self.tau
         self.price_dbdf = dynamic_dbdf if self._smooth_dynamic else static_dbdf
+        self._dyn_lbds = None  # lookback date per anal_date; see get_dyn_lbd
 
     # # methods relevant to group tail analysis behaviors # #
 
@@ -173,7 +262,9 @@ class Settings:
         if self.partition in {'country', 'maturity'}:
             # partition rules where IDs are readily parsed from ticker labels
             a, b = {'country': (0, 2), 'maturity': (3, 6)}[self.partition]
-            part_ids = set(tick[a:b] for tick in self.tickers)
+            # NOTE: sorted, as set order varies b/w runs (i.e. w/ str hash
+            # randomization), which the settings_digest & results depend on
+            part_ids = sorted(set(tick[a:b] for tick in self.tickers))
             part_map = {pid: [tick for tick in self.tickers if pid in tick]
                         for pid in part_ids}
         elif self.partition == 'region':
@@ -215,6 +306,10 @@ class Settings:
 
         if self.run_ks_test is False:
             sub_stats_maps['tail-statistics'].remove('ks_pv')
+        if self.run_ks_test is False or self.ks_stop is None:
+            sub_stats_maps['tail-statistics'].remove('ks_reps')
+        if not self.warm_start:
+            sub_stats_maps['tail-statistics'].remove('warm_start')
 
         rcnts, mean, stdv, skew, kurt, tstat, loglh = [
                 list(product((ss[0],), ss[1])) for ss in sub_stats_maps.items()]
@@ -310,7 +405,9 @@ class Settings:
             self.clauset_xmins_df = self.__precompute_clauset_xmins_df()
             xmins_df = self.clauset_xmins_df.rolling(rws).mean()
 
-        self.xmin_qnty = xmins_df.shift(lag).loc[self.date_i:self.date_f]
+        xmins_df = xmins_df.shift(lag)
+        self.xmin_qnty = xmins_df.iloc[self.__get_date_posns_slice(
+            xmins_df.index, self.date_i, self.date_f)]
 
     def __precompute_clauset_xmins_df(self):
         bound_i = self.__gdiab(self._n_bound_i)
@@ -371,12 +468,22 @@ class Settings:
 
     # # method exported to analysis.py, used strictly for logging # #
     def get_dyn_lbd(self, date):  # get dynamic lookback date
+        if self._dyn_lbds is None:  # NOTE: all looked up by position at once
+            self._dyn_lbds = self.__get_dyn_lbds()
+        return self._dyn_lbds[date]
+
+    def __get_dyn_lbds(self):
         if self.approach == 'monthly':
-            mmyyyy = date[3:]
-            return self.monthly_bounds[mmyyyy][0]
-        else:
-            date = date if self.approach == 'rolling' else self.date_i
-            return self.__gbdl(self._lookback, date0=date, incl_date0=True)
+            return {date: self.monthly_bounds[date[3:]][0]
+                    for date in self.anal_dates}
+        date0s = (self.anal_dates if self.approach == 'rolling' else
+                  [self.date_i] * len(self.anal_dates))
+        lbd_posns = (self._full_dates.get_indexer(date0s) -
+                     (self._lookback - 1))  # i.e. incl. each date0
+        assert (lbd_posns > 0).all(),\
+            (f"cannot go BACKWARDS {self._lookback} full days from "
+             f"{date0s[0]} in DateIndex:\n\n{self._full_dates}\n")
+        return dict(zip(self.anal_dates, self._full_dates[lbd_posns]))
 
     # # methods for creating the settings SimpleNamespace object(s) # #
 